@@ -1,9 +1,11 @@
-import configuration
+import tkinter.filedialog as tkd
+
 from ui.styles import Colors
 from ui.window import Window
-from ui.widgets import LabelFrame, Button, FileInput
+from ui.widgets import Button, FileInput
+from ui.install_view import InstallView
 
-from downloader.curseforge_downloader import DownloadManager, ModPack
+from downloader.curseforge_downloader import DownloadManager
 
 
 class MainWindow(Window):
@@ -16,15 +18,28 @@ class MainWindow(Window):
     def __init__(self):
         super().__init__(self.app_name, (self.width, self.height), lock_dimensions=False)
 
-        FileInput(self, Colors.secondary, "Input", (self.width, 40)).place(0, 0)
+        self.mod_pack_input = FileInput(
+            self, Colors.secondary, "Mod-Pack", (self.width, 40), file_types=[("Mod-Pack", "*.zip"), ("All Files", "*.*")]
+        )
+        self.destination_input = FileInput(
+            self, Colors.secondary, "Destination", (self.width, 40), placeholder="Select a folder", title="Select folder",
+            function=lambda initialdir, title, filetypes: tkd.askdirectory(initialdir=initialdir, title=title)
+        )
+        self.install_button = Button(self, Colors.primary, "Install", dimensions=(self.width, 40), command=self.install)
+        self.install_view = InstallView(self, Colors.secondary, "Install", (self.width, self.height - 160))
+
+        self.mod_pack_input.place(0, 0)
+        self.destination_input.place(1, 0)
+        self.install_button.grid(row=2, column=0)
+        self.install_view.place(3, 0)
+
+    def install(self):
+        mod_pack = self.mod_pack_input.get_path()
+        destination = self.destination_input.get_path()
+        if not mod_pack or not destination or self.install_view.is_running():
+            return
+        self.install_view.start(DownloadManager(mod_pack), destination)
 
 
 if __name__ == "__main__":
-    mod_pack = ModPack("https://www.curseforge.com/minecraft/modpacks/modpack-slug")
-    file = mod_pack.get_latest_file()
-
-    with DownloadManager(mod_pack.download_file(file)) as d_mgr:
-        d_mgr.register_listener("all", print)
-        d_mgr.download("target")
-
-    # MainWindow().mainloop()
+    MainWindow().mainloop()
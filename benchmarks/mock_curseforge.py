@@ -0,0 +1,212 @@
+import io
+import re
+import json
+import time
+import random
+import zipfile
+import hashlib
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class MockSettings:
+    def __init__(self, mods: int = 300, mod_size: int = 256 * 1024, latency: float = 0.02, bandwidth: int = 0, error_rate: float = 0.0, overrides: int = 50, seed: int = 1):
+        """
+        Shape of the simulated CurseForge api and CDN
+
+        :param mods:                    number of mods in the generated mod-pack
+        :param mod_size:                size of every mod file in bytes
+        :param latency:                 seconds every request is delayed before it is answered
+        :param bandwidth:               bytes per second per connection for file transfers (0 is unlimited)
+        :param error_rate:              share of requests answered with 503
+        :param overrides:               number of files in the overrides folder of the mod-pack
+        :param seed:                    seed of the error generator
+        """
+        self.mods = mods
+        self.mod_size = mod_size
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.overrides = overrides
+        self.random = random.Random(seed)
+
+
+PACK_ID = 100000
+PACK_FILE_ID = 100001
+PACK_SLUG = "bench-pack"
+
+
+def _mod_content(project_id: int, size: int) -> bytes:
+    block = hashlib.sha256(str(project_id).encode()).digest()
+    return (block * (size // len(block) + 1))[:size]
+
+
+class MockCurseForge:
+    def __init__(self, settings: MockSettings, host: str = "127.0.0.1", port: int = 0):
+        """
+        Local stand-in for configuration.c_forge_api and the download CDN (api under /api, files under /cdn)
+
+        :param settings:                shape of the simulated api
+        :param host:                    interface to listen on
+        :param port:                    port to listen on (0 picks a free port)
+        """
+        self.settings = settings
+        self.requests = 0
+        self.bytes_sent = 0
+        self.__lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self.__handler())
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self.__contents = {}
+        self.__pack = None
+
+    def start(self) -> "MockCurseForge":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return {"requests": self.requests, "bytes_sent": self.bytes_sent}
+
+    def count(self, sent: int = 0, request: bool = False):
+        with self.__lock:
+            self.requests += int(request)
+            self.bytes_sent += sent
+
+    def file_record(self, project_id: int) -> dict:
+        content = self.content(project_id)
+        return {
+            "id": project_id * 10 + 1,
+            "displayName": f"mod-{project_id}",
+            "fileName": f"mod-{project_id}.jar",
+            "fileLength": len(content),
+            "downloadUrl": f"{self.url}/cdn/{project_id}/mod-{project_id}.jar",
+            "hashes": [{"value": hashlib.sha1(content).hexdigest(), "algo": 1}],
+            "packageFingerprint": None
+        }
+
+    def content(self, project_id: int) -> bytes:
+        if project_id == PACK_ID:
+            return self.pack()
+        if project_id not in self.__contents:
+            self.__contents[project_id] = _mod_content(project_id, self.settings.mod_size)
+        return self.__contents[project_id]
+
+    def pack(self) -> bytes:
+        if self.__pack is None:
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, "w") as zf:
+                zf.writestr("manifest.json", json.dumps({
+                    "name": PACK_SLUG,
+                    "overrides": "overrides",
+                    "files": [{"projectID": i, "fileID": i * 10 + 1, "required": True} for i in range(1, self.settings.mods + 1)]
+                }))
+                for i in range(self.settings.overrides):
+                    zf.writestr(f"overrides/config/bench-{i}.cfg", f"value={i}\n" * 100)
+            self.__pack = buffer.getvalue()
+        return self.__pack
+
+    def pack_record(self) -> dict:
+        return {
+            "id": PACK_ID,
+            "slug": PACK_SLUG,
+            "name": "Benchmark Pack",
+            "latestFiles": [{
+                "id": PACK_FILE_ID,
+                "fileName": f"{PACK_SLUG}.zip",
+                "fileLength": len(self.pack()),
+                "downloadUrl": f"{self.url}/cdn/{PACK_ID}/{PACK_SLUG}.zip"
+            }]
+        }
+
+    def __handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def __send(self, status: int, body: bytes = b"", headers: dict = None, send_body: bool = True):
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                if not send_body:
+                    return
+                step = max(1, mock.settings.bandwidth // 20) if mock.settings.bandwidth else len(body) or 1
+                for start in range(0, len(body), step):
+                    self.wfile.write(body[start:start + step])
+                    mock.count(min(step, len(body) - start))
+                    if mock.settings.bandwidth:
+                        time.sleep(step / mock.settings.bandwidth)
+
+            def __json(self, data):
+                self.__send(200, json.dumps(data).encode(), {"Content-Type": "application/json"})
+
+            def __begin(self) -> bool:
+                mock.count(request=True)
+                time.sleep(mock.settings.latency)
+                if mock.settings.error_rate and mock.settings.random.random() < mock.settings.error_rate:
+                    self.__send(503, b"", {"Retry-After": "0"})
+                    return False
+                return True
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if not self.__begin():
+                    return
+                if urlparse(self.path).path != "/api/addon/files":
+                    return self.__send(404)
+                self.__json({str(file_id): [mock.file_record(file_id // 10)] for file_id in json.loads(body)})
+
+            def do_HEAD(self):
+                self.do_GET(send_body=False)
+
+            def do_GET(self, send_body: bool = True):
+                path = urlparse(self.path).path
+                if path == "/_stats":
+                    return self.__json(mock.stats())
+                if not self.__begin():
+                    return
+
+                match = re.fullmatch(r"/cdn/(\d+)/[^/]+", path)
+                if match:
+                    content = mock.content(int(match.group(1)))
+                    headers = {"Accept-Ranges": "bytes", "Content-Type": "application/octet-stream"}
+                    ranged = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+                    if ranged is None:
+                        return self.__send(200, content, headers, send_body)
+                    start = int(ranged.group(1))
+                    end = int(ranged.group(2)) if ranged.group(2) else len(content) - 1
+                    if start >= len(content):
+                        return self.__send(416, b"", {"Content-Range": f"bytes */{len(content)}"})
+                    headers["Content-Range"] = f"bytes {start}-{end}/{len(content)}"
+                    return self.__send(206, content[start:end + 1], headers, send_body)
+
+                if path == "/api/addon/search":
+                    first_page = parse_qs(urlparse(self.path).query).get("index", ["0"])[0] == "0"
+                    return self.__json([mock.pack_record()] if first_page else [])
+                match = re.fullmatch(r"/api/addon/(\d+)/file/(\d+)", path)
+                if match:
+                    return self.__json(mock.file_record(int(match.group(1))))
+                match = re.fullmatch(r"/api/addon/(\d+)/files", path)
+                if match:
+                    project_id = int(match.group(1))
+                    return self.__json(mock.pack_record()["latestFiles"] if project_id == PACK_ID else [mock.file_record(project_id)])
+                match = re.fullmatch(r"/api/addon/(\d+)", path)
+                if match:
+                    project_id = int(match.group(1))
+                    return self.__json(mock.pack_record() if project_id == PACK_ID else {
+                        "id": project_id, "latestFiles": [mock.file_record(project_id)]
+                    })
+                self.__send(404)
+
+        return Handler
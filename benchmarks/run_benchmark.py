@@ -0,0 +1,115 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import multiprocessing
+from shutil import rmtree
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_curseforge import MockCurseForge, MockSettings, PACK_SLUG
+
+
+def _serve(settings: dict, conn):
+    mock = MockCurseForge(MockSettings(**settings)).start()
+    conn.send(mock.url)
+    conn.recv()
+    mock.stop()
+
+
+def _peak_rss() -> int or None:
+    if resource is None:
+        return
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run(settings: dict, workers: int = None, resolve_workers: int = None, pipelined: bool = False) -> dict:
+    """
+    Installs the generated mod-pack from a mock api running in a separate process and measures the run
+
+    :param settings:                    kwargs for mock_curseforge.MockSettings
+    :param workers:                     download workers of the DownloadManager
+    :param resolve_workers:             resolution workers (sets configuration.resolve_workers)
+    :param pipelined:                   use the pipelined resolve-and-download mode
+    :return:                            measured values
+    """
+    parent, child = multiprocessing.Pipe()
+    server = multiprocessing.Process(target=_serve, args=(settings, child), daemon=True)
+    server.start()
+    url = parent.recv()
+
+    import configuration
+    configuration.c_forge_api = f"{url}/api"
+    if resolve_workers:
+        configuration.resolve_workers = resolve_workers
+
+    from downloader.http_client import HttpClient
+    from downloader.modpack_repository import ModPack
+    from downloader.curseforge_downloader import DownloadManager
+
+    destination = tempfile.mkdtemp()
+    try:
+        with HttpClient() as client:
+            start = time.monotonic()
+            mod_pack = ModPack(f"https://www.curseforge.com/minecraft/modpacks/{PACK_SLUG}", client=client)
+            pack_path = mod_pack.download_file(mod_pack.get_latest_file())
+            pack_done = time.monotonic()
+
+            with DownloadManager(pack_path, workers=workers, client=client) as d_mgr:
+                d_mgr.download(destination, pipelined=pipelined)
+                metrics = d_mgr.metrics.to_dict()
+                failed = len(d_mgr.errors)
+            end = time.monotonic()
+
+            stats = client.get(f"{url}/_stats").json()
+            rmtree(os.path.dirname(pack_path))
+    finally:
+        parent.send("stop")
+        server.join()
+        rmtree(destination)
+
+    phases = metrics["phases"]
+    return {
+        "pack_seconds": round(pack_done - start, 3),
+        "metadata_seconds": phases.get("resolve"),
+        "download_seconds": phases.get("download", phases.get("resolve_and_download")),
+        "total_seconds": round(end - start, 3),
+        "download_mib_per_second": round(metrics["bytes_per_second"] / 2 ** 20, 2),
+        "peak_rss_mib": None if _peak_rss() is None else round(_peak_rss() / 2 ** 20, 1),
+        "requests": stats.get("requests"),
+        "bytes_sent": stats.get("bytes_sent"),
+        "retries": metrics["retries"],
+        "errors": failed,
+        "metrics": metrics
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the downloader against a local mock CurseForge api and CDN")
+    parser.add_argument("--mods", type=int, default=300, help="number of mods in the generated pack")
+    parser.add_argument("--mod-size", type=int, default=256 * 1024, help="size of every mod file in bytes")
+    parser.add_argument("--overrides", type=int, default=50, help="number of override files in the pack")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds every request is delayed")
+    parser.add_argument("--bandwidth", type=int, default=0, help="bytes per second per connection (0 is unlimited)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--workers", type=int, default=None, help="download workers")
+    parser.add_argument("--resolve-workers", type=int, default=None, help="resolution workers")
+    parser.add_argument("--pipelined", action="store_true", help="use the pipelined resolve-and-download mode")
+    args = parser.parse_args()
+
+    print(json.dumps(run(
+        {
+            "mods": args.mods, "mod_size": args.mod_size, "overrides": args.overrides, "latency": args.latency,
+            "bandwidth": args.bandwidth, "error_rate": args.error_rate
+        },
+        workers=args.workers, resolve_workers=args.resolve_workers, pipelined=args.pipelined
+    ), indent=2))
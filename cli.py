@@ -0,0 +1,239 @@
+import time
+
+_started = time.perf_counter()
+
+import os
+import sys
+import argparse
+
+import configuration
+
+
+# Heavy modules (requests, the downloader package) are imported inside the commands which need them,
+# tkinter is never imported by the command line interface.
+
+
+def _log(args: argparse.Namespace, *values):
+    if not args.quiet:
+        print(*values, file=sys.stderr)
+
+
+def _report_startup(args: argparse.Namespace):
+    _log(args, f"startup: {(time.perf_counter() - _started) * 1000:.1f} ms")
+
+
+def _configure(args: argparse.Namespace):
+    if getattr(args, "workers", None):
+        configuration.download_workers = args.workers
+    if getattr(args, "resolve_workers", None):
+        configuration.resolve_workers = args.resolve_workers
+    if getattr(args, "connections_per_host", None):
+        configuration.connections_per_host = args.connections_per_host
+
+
+def _cache(args: argparse.Namespace):
+    if args.no_cache:
+        return
+    from downloader.metadata_cache import MetadataCache
+    return MetadataCache(os.path.join(args.cache_dir, "metadata.sqlite") if args.cache_dir else None)
+
+
+def _store(args: argparse.Namespace):
+    if args.store is None:
+        return
+    from downloader.jar_store import JarStore
+    return JarStore(args.store or configuration.store_path)
+
+
+def _listeners(args: argparse.Namespace) -> dict[str, callable]:
+    # failed files (also unresolved ones) are printed from the errors of the manager once the command has ended
+    listeners = {
+        "lock_stale": lambda path: _log(args, f"lockfile {path} does not match the manifest, resolving mods")
+    }
+    if not args.quiet:
+        listeners["mod_load_progress"] = lambda done, total: print(f"resolving {done}/{total}", file=sys.stderr)
+        listeners["download_progress"] = lambda done, total, name: print(f"downloading {done}/{total} {name}", file=sys.stderr)
+    return listeners
+
+
+def _open(args: argparse.Namespace, cache, store):
+    from downloader.modpack_repository import ModPack
+    from downloader.curseforge_downloader import DownloadManager
+
+    location = args.pack
+    mod_pack = ModPack(location, cache=cache)
+    if mod_pack.is_url():
+        location = mod_pack.download_file(mod_pack.get_latest_file())
+
+    d_mgr = DownloadManager(location, cache=cache, store=store, lockfile=args.lockfile)
+    for channel, callback in _listeners(args).items():
+        d_mgr.register_listener(channel, callback)
+    return d_mgr
+
+
+def _print_errors(errors: list, prefix: str = "") -> int:
+    for error in errors:
+        print(f"{prefix}error: {error}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+def _print_metrics(args: argparse.Namespace, d_mgr):
+    if args.metrics == "json":
+        print(d_mgr.metrics.to_json(indent=2))
+    elif args.metrics == "prometheus":
+        print(d_mgr.metrics.to_prometheus(), end="")
+
+
+def install(args: argparse.Namespace) -> int:
+    cache, store = _cache(args), _store(args)
+    _report_startup(args)
+    try:
+        with _open(args, cache, store) as d_mgr:
+            d_mgr.download(args.destination, pipelined=args.pipelined)
+            if args.lockfile and not d_mgr.errors:
+                d_mgr.export_lock(d_mgr.lockfile)
+        _print_metrics(args, d_mgr)
+        return _print_errors(d_mgr.errors)
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def upgrade(args: argparse.Namespace) -> int:
+    cache, store = _cache(args), _store(args)
+    _report_startup(args)
+    try:
+        with _open(args, cache, store) as d_mgr:
+            plan = d_mgr.upgrade(args.destination, dry_run=args.dry_run)
+        print(plan)
+        _print_metrics(args, d_mgr)
+        return _print_errors(d_mgr.errors)
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def verify(args: argparse.Namespace) -> int:
+    cache, store = _cache(args), _store(args)
+    _report_startup(args)
+    try:
+        with _open(args, cache, store) as d_mgr:
+            report = d_mgr.verify(args.destination, repair=not args.no_repair, remove_extra=not args.keep_extra)
+        print(report)
+        for label, names in (
+            ("missing", report.missing), ("corrupt", report.corrupt), ("extra", report.extra), ("unresolved", report.unresolved)
+        ):
+            for name in names:
+                _log(args, f"{label}: {name}")
+        _print_metrics(args, d_mgr)
+        unrepaired = set(report.missing + report.corrupt) - set(report.repaired)
+        code = _print_errors(d_mgr.errors)
+        return 1 if code or unrepaired or report.unresolved or (args.no_repair and not report.is_healthy()) else 0
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def batch(args: argparse.Namespace) -> int:
+    if len(args.pairs) % 2:
+        raise SystemExit("batch expects <mod-pack> <destination> pairs")
+    from downloader.batch_installer import BatchInstaller
+
+    cache, store = _cache(args), _store(args)
+    _report_startup(args)
+    try:
+        installer = BatchInstaller(
+            list(zip(args.pairs[0::2], args.pairs[1::2])), store=store, cache=cache, workers=args.workers
+        )
+        for channel, callback in _listeners(args).items():
+            installer.register_listener(channel, callback)
+        code = 0
+        for destination, errors in installer.install().items():
+            code |= _print_errors(errors, f"{destination}: ")
+        return code
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def gc(args: argparse.Namespace) -> int:
+    from downloader.jar_store import JarStore
+
+    _report_startup(args)
+    removed = JarStore(args.store or configuration.store_path).gc()
+    _log(args, f"removed {len(removed)} unreferenced files")
+    return 0
+
+
+def parser() -> argparse.ArgumentParser:
+    main_parser = argparse.ArgumentParser(prog="curseforge-mc-modpack-downloader", description="Headless CurseForge mod-pack installer")
+    main_parser.add_argument("-q", "--quiet", action="store_true", help="only print errors")
+    commands = main_parser.add_subparsers(dest="command", required=True)
+
+    def add_options(command: argparse.ArgumentParser):
+        command.add_argument("--workers", type=int, help="parallel downloads (configuration.download_workers)")
+        command.add_argument("--resolve-workers", type=int, help="parallel metadata lookups (configuration.resolve_workers)")
+        command.add_argument("--connections-per-host", type=int, help="parallel downloads per host (configuration.connections_per_host)")
+        command.add_argument("--cache-dir", help="folder of the metadata cache (defaults to the folder of configuration.cache_path)")
+        command.add_argument("--no-cache", action="store_true", help="don't use the persistent metadata cache")
+        command.add_argument("--store", nargs="?", const="", help="link mods from a shared jar store (defaults to configuration.store_path)")
+        command.add_argument("--quiet", "-q", action="store_true", default=argparse.SUPPRESS, help="only print errors")
+
+    def add_pack(command: argparse.ArgumentParser):
+        command.add_argument("pack", help="mod-pack url, .zip file or folder with manifest.json")
+        command.add_argument("destination", help="folder the mod-pack is installed to")
+        command.add_argument(
+            "--lockfile", nargs="?", const=True, metavar="PATH",
+            help="install from and write a lockfile at PATH (defaults to next to the mod-pack, which is a temporary folder for urls)"
+        )
+        command.add_argument("--metrics", choices=("json", "prometheus"), help="print the metrics of the run to stdout")
+
+    command = commands.add_parser("install", help="install a mod-pack")
+    add_pack(command)
+    add_options(command)
+    command.add_argument("--pipelined", action="store_true", help="download every mod as soon as it is resolved")
+    command.set_defaults(run=install)
+
+    command = commands.add_parser("upgrade", help="upgrade an existing install to a mod-pack")
+    add_pack(command)
+    add_options(command)
+    command.add_argument("--dry-run", action="store_true", help="only print the upgrade plan")
+    command.set_defaults(run=upgrade)
+
+    command = commands.add_parser("verify", help="check the mods of an existing install and repair them")
+    add_pack(command)
+    add_options(command)
+    command.add_argument("--no-repair", action="store_true", help="only report missing, corrupt and extra files")
+    command.add_argument("--keep-extra", action="store_true", help="don't remove files which are not part of the mod-pack")
+    command.set_defaults(run=verify)
+
+    command = commands.add_parser("batch", help="install several mod-packs, shared mods are downloaded once")
+    command.add_argument("pairs", nargs="+", metavar="<mod-pack> <destination>")
+    add_options(command)
+    command.set_defaults(run=batch)
+
+    command = commands.add_parser("gc", help="remove files of the jar store which no install uses")
+    command.add_argument("--store", help="location of the jar store (defaults to configuration.store_path)")
+    command.add_argument("--quiet", "-q", action="store_true", default=argparse.SUPPRESS, help="only print errors")
+    command.set_defaults(run=gc)
+    return main_parser
+
+
+def main(argv: list[str] = None) -> int:
+    """
+    Runs the command line interface
+
+    :param argv:                        arguments (defaults to sys.argv[1:])
+    :return:                            exit code (1 if any file failed)
+    """
+    args = parser().parse_args(argv)
+    _configure(args)
+    try:
+        return args.run(args)
+    except (ConnectionError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,43 @@
+import os
+
 c_forge_api = "https://addons-ecs.forgesvc.net/api/v2"
 request_headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/95.0.4638.54 Safari/537.36",
     "referer": "https://software-city.org"
 }
+
+resolve_workers = 16
+resolve_batch_size = 100
+search_page_size = 50
+search_max_results = 1000
+download_workers = 8
+connections_per_host = 4
+pipeline_queue_size = 32
+verify_retries = 2
+download_chunk_size = 1024 * 1024
+progress_interval = 0.1
+override_workers = 4
+segmented_threshold = 32 * 1024 * 1024
+download_segments = 4
+verify_workers = os.cpu_count() or 4
+mmap_threshold = 16 * 1024 * 1024
+
+request_timeout = 60
+http_pool_hosts = 10
+http_pool_size = 32
+async_connections = 256
+async_connections_per_host = 32
+
+cache_path = os.path.join(os.path.expanduser("~"), ".cache", "curseforge-mc-modpack-downloader", "metadata.sqlite")
+cache_max_entries = 200000
+cache_ttl = 60 * 60
+store_path = os.path.join(os.path.expanduser("~"), ".cache", "curseforge-mc-modpack-downloader", "jars")
+store_gc_grace = 60 * 60
+
+max_retries = 4
+retry_backoff = 0.5
+retry_max_backoff = 30
+request_rate = 50
+request_burst = 100
+breaker_threshold = 10
+breaker_timeout = 30
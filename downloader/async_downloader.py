@@ -0,0 +1,592 @@
+import os
+import asyncio
+import hashlib
+import tempfile
+import threading
+
+import aiohttp
+
+import configuration
+
+from downloader.modpack_repository import ModPack
+from downloader.mod_repository import Mod
+from downloader.metadata_cache import MetadataCache, file_index
+from downloader.async_http_client import AsyncHttpClient
+from downloader.hashing import file_sha1, file_fingerprint
+from downloader.events import EventBus
+from downloader.jar_store import JarStore
+from downloader.curseforge_downloader import DownloadManager
+
+
+REQUEST_ERRORS = (ConnectionError, aiohttp.ClientError, asyncio.TimeoutError)
+
+
+async def _stream_to_file(resp: aiohttp.ClientResponse, path: str, progress: callable = None, offset: int = 0) -> tuple[str, int]:
+    # the loop only buffers the body, hashing and writing of every configuration.download_chunk_size block
+    # run on the default executor; appends to the first `offset` bytes of path (hashed first) if offset,
+    # returns (SHA-1, size of the file)
+    loop = asyncio.get_running_loop()
+    sha1 = hashlib.sha1()
+    total = offset + (resp.content_length or 0)
+    written = offset
+
+    def hash_existing():
+        with open(path, "rb") as existing:
+            for block in iter(lambda: existing.read(configuration.download_chunk_size), b""):
+                sha1.update(block)
+
+    def write(f, data: bytearray) -> int:
+        sha1.update(data)
+        return f.write(data)
+
+    if offset:
+        await loop.run_in_executor(None, hash_existing)
+    f = await loop.run_in_executor(None, open, path, "ab" if offset else "wb")
+    try:
+        buffer = bytearray()
+        async for data in resp.content.iter_any():
+            buffer += data
+            if len(buffer) >= configuration.download_chunk_size:
+                block, buffer = buffer, bytearray()
+                written += await loop.run_in_executor(None, write, f, block)
+                if progress is not None:
+                    progress(written, total)
+        if buffer:
+            written += await loop.run_in_executor(None, write, f, buffer)
+            if progress is not None:
+                progress(written, total)
+    finally:
+        await loop.run_in_executor(None, f.close)
+    return sha1.hexdigest(), written
+
+
+class AsyncModPack(ModPack):
+    def __init__(self, mod_pack: str, cache: MetadataCache = None, client: AsyncHttpClient = None):
+        """
+        Awaitable version of downloader.modpack_repository.ModPack\n
+        The mod-pack info is requested by `await self.load()` which has to be called before using the object.
+
+        :param mod_pack:                Mod Pack location (can be: url, .zip file, folder with manifest.json)
+        :param cache:                   persistent metadata cache to read from and fill
+        :param client:                  shared async HTTP client
+        """
+        self.mod_pack_loc = mod_pack
+        self.cache = cache
+        self.client = client or AsyncHttpClient()
+        self.mod_pack = None
+
+    async def load(self):
+        self.mod_pack = await self._get_mod_pack_from_url()
+        return self
+
+    async def __get(self, path: str, missing_ok: bool = False, cached: bool = True) -> dict or list or None:
+        data = await asyncio.to_thread(self._cached, path) if cached else None
+        if data is not None:
+            return data
+        async with await self.client.get(self.client.api_url(path)) as resp:
+            if resp.status == 404 and missing_ok:
+                return
+            if not resp.status == 200:
+                raise ConnectionError(resp.status, resp.reason, f"Failed after {self.client.retry.max_retries} retries")
+            data = await resp.json(content_type=None)
+        if cached:
+            await asyncio.to_thread(self._store, path, data)
+        return data
+
+    async def _get_mod_pack_from_url(self) -> dict or None:
+        if not self.is_url():
+            return
+
+        slug, project_id = self._parse_location()
+        project_id = project_id or await asyncio.to_thread(self._known_project_id, slug)
+        if project_id is not None:
+            project = await self.__get(f"addon/{project_id}", missing_ok=True)
+            if project is not None and slug in (None, project.get("slug")):
+                return project
+
+        if slug is not None:
+            for index in range(0, configuration.search_max_results, configuration.search_page_size):
+                results = await self.__get(self._search_path(slug, index), cached=False)
+                project = await asyncio.to_thread(self._match_search, slug, results)
+                if project is not None:
+                    return project
+                if len(results) < configuration.search_page_size:
+                    break
+        raise ConnectionError(404, "Not Found", f"Mod-pack '{self.mod_pack_loc}' not found")
+
+    async def get_available_files(self) -> list:
+        path = f"addon/{self.mod_pack.get('id')}/files"
+        files = await asyncio.to_thread(self._cached, path)
+        if files is not None:
+            return files
+
+        files = await self.__get(path, cached=False)
+        await asyncio.to_thread(self._store, path, files)
+        file_index.put_files(self.mod_pack.get("id"), files)
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.put_files, self.mod_pack.get("id"), files)
+        return files
+
+    async def download_file(self, file: dict, progress: callable = None) -> str:
+        """
+        Downloads the specified file of the mod pack to a temporary location and returns its path
+
+        :param file:                file dict for file under mod pack
+        :param progress:            callback for file download progress
+        :return:                    downloaded file location
+        """
+        destination = os.path.join(tempfile.mkdtemp(), file.get("fileName"))
+        is_url = self.is_url()
+        async with await self.client.get(file.get("downloadUrl")) as resp:
+            if not resp.status == 200:
+                raise ConnectionError(resp.status, resp.reason)
+            await _stream_to_file(
+                resp, destination, None if progress is None else lambda size, total: progress(size, total, is_url)
+            )
+        return destination
+
+
+class AsyncModRepository:
+    def __init__(
+        self,
+        files_from_manifest: list,
+        progress: callable = None,
+        on_resolved: callable = None,
+        cache: MetadataCache = None,
+        batch_size: int = None,
+        client: AsyncHttpClient = None
+    ):
+        """
+        Awaitable version of downloader.mod_repository.ModRepository, all lookups run concurrently
+        on the event loop (the number of open connections is limited by the client),
+        the blocking MetadataCache calls run on worker threads in bulk\n
+        Use as `mods, errors = await AsyncModRepository(files).get()`.
+
+        :param files_from_manifest:     "files" list of the manifest.json
+        :param progress:                callback for resolution progress (called with done, total)
+        :param on_resolved:             callback called with every Mod as soon as it is resolved
+        :param cache:                   persistent metadata cache to read from and fill
+        :param batch_size:              number of files resolved per bulk request (defaults to configuration.resolve_batch_size, 0 disables bulk requests)
+        :param client:                  shared async HTTP client
+        """
+        self.files = list(files_from_manifest)
+        self.mod_list = list()
+        self.errors = list()
+        self.progress_callback = progress
+        self.resolved_callback = on_resolved
+        self.cache = cache
+        self.client = client or AsyncHttpClient()
+        self.batch_size = configuration.resolve_batch_size if batch_size is None else batch_size
+        self.__done = 0
+
+    async def __make_request(self, path: str, missing_ok: bool = False):
+        async with await self.client.get(self.client.api_url(f"addon/{path}")) as resp:
+            if resp.status == 404 and missing_ok:
+                return
+            if resp.status != 200:
+                raise ConnectionError(resp.status, resp.reason, f"Failed after {self.client.retry.max_retries} retries")
+            return await resp.json(content_type=None)
+
+    async def __lookup(self, mod_id: int, file_id: int) -> dict:
+        file = await self.__make_request(f"{mod_id}/file/{file_id}", missing_ok=True)
+        if file is not None:
+            return file
+
+        project = await self.__make_request(str(mod_id))
+        for file in project.get("latestFiles") or []:
+            if file.get("id") == file_id:
+                return file
+
+        if not file_index.has_project(mod_id):
+            files = await self.__make_request(f"{mod_id}/files")
+            file_index.put_files(mod_id, files)
+            if self.cache is not None:
+                await asyncio.to_thread(self.cache.put_files, mod_id, files)
+            file = file_index.get_file(mod_id, file_id)
+            if file is not None:
+                return file
+        raise ConnectionError(404, "Not Found", f"File '{file_id}' does not exist in project '{mod_id}'")
+
+    def __known(self, file: dict) -> dict or None:
+        record = file_index.get_file(file.get("projectID"), file.get("fileID"))
+        if record is None and self.cache is not None:
+            record = self.cache.get_file(file.get("projectID"), file.get("fileID"))
+        return record
+
+    async def __request_files(self, file_ids: list) -> dict:
+        try:
+            async with await self.client.post(self.client.api_url("addon/files"), json=file_ids) as resp:
+                if resp.status != 200:
+                    return {}
+                data = await resp.json(content_type=None)
+        except REQUEST_ERRORS:
+            return {}
+
+        if type(data) == dict:
+            data = [file for files in data.values() for file in (files if type(files) == list else [files])]
+        return {file.get("id"): file for file in data}
+
+    async def __resolve(self, i: int, file: dict, record: dict or None, results: list, fetched: bool = True):
+        mod_id, file_id = file.get("projectID"), file.get("fileID")
+        try:
+            if record is None:
+                record = await self.__lookup(mod_id, file_id)
+        except REQUEST_ERRORS:
+            self.errors.append((mod_id, file_id))
+        else:
+            if self.cache is not None and fetched:
+                await asyncio.to_thread(self.cache.put_file, mod_id, record)
+            results[i] = mod = Mod(mod_id, file_id, cache=self.cache, file=record, client=self.client)
+            if self.resolved_callback is not None:
+                self.resolved_callback(mod)
+
+        self.__done += 1
+        if self.progress_callback is not None:
+            self.progress_callback(self.__done, len(self.files))
+
+    async def __resolve_batch(self, chunk: list[tuple[int, dict]], results: list):
+        records = await self.__request_files([file.get("fileID") for _, file in chunk])
+        if self.cache is not None:
+            await asyncio.to_thread(self.__store_records, chunk, records)
+        await asyncio.gather(*(
+            self.__resolve(i, file, records.get(file.get("fileID")), results, fetched=False) for i, file in chunk
+        ))
+
+    def __store_records(self, chunk: list[tuple[int, dict]], records: dict):
+        # one put_files per project of a bulk chunk
+        projects = {}
+        for _, file in chunk:
+            if file.get("fileID") in records:
+                projects.setdefault(file.get("projectID"), []).append(records[file.get("fileID")])
+        for project_id, files in projects.items():
+            self.cache.put_files(project_id, files)
+
+    async def get(self) -> tuple[list[Mod], list]:
+        required = [file for file in self.files if file.get("required")]
+        results = [None] * len(required)
+        self.__done = len(self.files) - len(required)
+
+        tasks = []
+        unknown = []
+        known = await asyncio.to_thread(lambda: [self.__known(file) for file in required])
+        for i, (file, record) in enumerate(zip(required, known)):
+            if record is not None:
+                tasks.append(self.__resolve(i, file, record, results, fetched=False))
+            else:
+                unknown.append((i, file))
+
+        if self.batch_size:
+            for start in range(0, len(unknown), self.batch_size):
+                tasks.append(self.__resolve_batch(unknown[start:start + self.batch_size], results))
+        else:
+            tasks += [self.__resolve(i, file, None, results) for i, file in unknown]
+
+        await asyncio.gather(*tasks)
+        self.mod_list = [mod for mod in results if mod is not None]
+        return self.mod_list, self.errors
+
+
+class AsyncDownloadManager(DownloadManager):
+    def __init__(self, mod_pack: str, cache: MetadataCache = None, client: AsyncHttpClient = None, events: EventBus = None, lockfile: str or bool = None, store: JarStore = None):
+        """
+        DownloadManager running all requests on one asyncio event loop instead of a pool of threads\n
+        Every mod is downloaded as soon as it is resolved, file writes and hashing run on the loop's default executor.
+        Use `await self.download(destination)` from async code or self.download_sync/self.initialize from sync code,
+        inside an event loop use the manager as `async with` so closing it doesn't block the loop.
+        The blocking methods of the DownloadManager (get_mod_list, upgrade, verify, export_lock, ...) keep working
+        from sync code, every request they make runs the async code on a new event loop.
+
+        :param mod_pack:                Reference to the wanted mod-pack (can be: .zip file, folder with manifest.json)
+        :param cache:                   persistent metadata cache used while resolving mods
+        :param client:                  shared async HTTP client (a client owned by the manager is created and closed per run if None),
+                                        the blocking methods need a client which isn't bound to another event loop
+        :param events:                  event bus the listeners are registered on
+        :param lockfile:                install from this lockfile instead of resolving the mods if it matches the manifest
+                                        (True uses the default location next to the manifest, see self.lock_path())
+        :param store:                   shared jar store, mods are downloaded into it and linked into the destination
+        """
+        self.__owns_client = client is None
+        super().__init__(mod_pack, cache=cache, client=client or AsyncHttpClient(), events=events, lockfile=lockfile, store=store)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await asyncio.to_thread(self.finish)
+
+    def __run(self, coroutine):
+        # runs a coroutine for a blocking method on a new event loop (the owned client is bound to that loop)
+        async def run():
+            try:
+                return await coroutine
+            finally:
+                if self.__owns_client:
+                    await self.client.close()
+        return asyncio.run(run())
+
+    def _resolve_mods(self, files: list[dict], on_resolved: callable = None) -> tuple[list, list]:
+        return self.__run(self.__resolve_mods(files, on_resolved))
+
+    def _download_mod(self, mod_file: Mod, to: str):
+        self.__run(self.__download_mod(mod_file, to))
+
+    def _store_mod(self, mod_file: Mod) -> str or None:
+        return self.__run(self.__store_mod(mod_file))
+
+    def _download_mods(self, to: str):
+        self.__run(self.__download_mods(to))
+
+    def _resolve_and_download_mods(self, to: str) -> list:
+        return self.__run(self.__resolve_and_download_mods(to))
+
+    async def __resolve_mods(self, files: list[dict], on_resolved: callable = None) -> tuple[list, list]:
+        return await AsyncModRepository(
+            files,
+            progress=lambda done, total: self.events.emit("mod_load_progress", done, total),
+            on_resolved=on_resolved,
+            cache=self.cache,
+            client=self.client
+        ).get()
+
+    async def __fetch(self, url: str, part_path: str, name: str, size: int = None) -> str or None:
+        # like DownloadManager.__fetch: the SHA-1 of the part, "" if it has to be fetched again or None on failure
+        offset = await asyncio.to_thread(lambda: os.path.getsize(part_path) if os.path.isfile(part_path) else 0)
+        if size is not None and offset > size:
+            await asyncio.to_thread(os.remove, part_path)
+            offset = 0
+        if offset and offset == size:
+            return await asyncio.to_thread(file_sha1, part_path)
+
+        try:
+            async with await self.client.get(url, headers={"Range": f"bytes={offset}-"} if offset else {}) as resp:
+                if resp.status == 416:
+                    await asyncio.to_thread(os.remove, part_path)
+                    return ""
+                if resp.status not in (200, 206):
+                    self._add_error((name, resp.status, resp.reason))
+                    return
+                if resp.status == 200:
+                    offset = 0
+                digest, written = await _stream_to_file(
+                    resp, part_path, lambda done, total: self.events.emit("download_file_progress", done, total, name), offset
+                )
+        except REQUEST_ERRORS:
+            # the part written so far is resumed by the next attempt
+            return ""
+        except OSError as e:
+            self._add_error((name, None, str(e)))
+            return
+        self.metrics.add_bytes(written - offset)
+
+        if size is not None and written != size:
+            return ""
+        return digest
+
+    async def __download_file(self, file: dict, to: str, file_name: str = None) -> bool:
+        name = file.get("name")
+        path = os.path.join(to, file_name or name)
+        part_path = path + ".part"
+        await asyncio.to_thread(os.makedirs, to, exist_ok=True)
+
+        if await asyncio.to_thread(self._is_present, path, file.get("size"), file.get("sha1")):
+            self.events.emit("download_file_skipped", name)
+            return True
+
+        for attempt in range(configuration.verify_retries + 1):
+            digest = await self.__fetch(file.get("url"), part_path, name, file.get("size"))
+            if digest is None:
+                return False
+            if digest == "":
+                reason = "Incomplete download"
+                self.events.emit("download_interrupted", name, attempt + 1)
+                continue
+            if file.get("sha1") is not None:
+                valid = digest == file.get("sha1")
+            elif file.get("fingerprint") is not None:
+                valid = await asyncio.to_thread(file_fingerprint, part_path) == file.get("fingerprint")
+            else:
+                valid = True
+
+            if valid:
+                await asyncio.to_thread(os.replace, part_path, path)
+                return True
+            await asyncio.to_thread(os.remove, part_path)
+            reason = "Checksum mismatch"
+            self.events.emit("download_verify_error", name, attempt + 1)
+
+        self._add_error((name, None, f"{reason} after {configuration.verify_retries + 1} attempts"))
+        return False
+
+    async def __download_mod(self, mod_file: Mod, to: str):
+        file = mod_file.get()
+        if self.store is None:
+            await self.__download_file(file, to)
+            return
+
+        target = os.path.join(to, file.get("name"))
+        if await asyncio.to_thread(self._is_present, target, file.get("size"), file.get("sha1")):
+            self.events.emit("download_file_skipped", file.get("name"))
+            return
+
+        for _ in range(2):
+            key = await self.__store_mod(mod_file)
+            if key is None:
+                return
+            try:
+                self.events.emit("download_file_linked", file.get("name"), await asyncio.to_thread(self.store.place, key, target))
+                return
+            except FileNotFoundError:
+                # the entry was collected (JarStore.gc) by another process before it could be placed, store it again
+                continue
+
+    async def __store_mod(self, mod_file: Mod) -> str or None:
+        file = mod_file.get()
+        key = self.store.key(mod_file.mod_id, mod_file.file_id, file.get("sha1"))
+        if await asyncio.to_thread(self.store.has, key):
+            return key
+
+        temp_path = await asyncio.to_thread(self.store.temp_path, key)
+        try:
+            if not await self.__download_file(file, os.path.dirname(temp_path), os.path.basename(temp_path)):
+                return
+            await asyncio.to_thread(self.store.commit, temp_path, key)
+        finally:
+            for path in (temp_path, temp_path + ".part"):
+                if await asyncio.to_thread(os.path.isfile, path):
+                    await asyncio.to_thread(os.remove, path)
+        return key
+
+    async def __download_tracked(self, mod_file: Mod, to: str, done: list, total: int):
+        try:
+            await self.__download_mod(mod_file, to)
+        except Exception as e:
+            self._add_error((mod_file.get().get("name"), None, str(e)))
+        done.append(mod_file)
+        self.events.emit("download_progress", len(done), total, mod_file.get().get("name"))
+
+    async def __download_mods(self, to: str):
+        self.events.emit("download_start")
+        if self.manifest is None or self.mods is None:
+            raise Exception("WrongOrderException", "functions called in wrong order leading to missing parameters")
+        done = []
+        await asyncio.gather(*(self.__download_tracked(mod_file, to, done, len(self.mods)) for mod_file in self.mods))
+        self.events.emit("download_end")
+
+    async def __resolve_and_download_mods(self, to: str) -> list:
+        self.events.emit("download_start")
+        total = len([file for file in self.manifest.get("files") if file.get("required")])
+        done = []
+        downloads = []
+
+        def on_resolved(mod_file: Mod):
+            downloads.append(asyncio.create_task(self.__download_tracked(mod_file, to, done, total)))
+
+        self.events.emit("mod_load_start")
+        locked = await asyncio.to_thread(self._get_locked_mods)
+        if locked is not None:
+            for mod_file in locked:
+                on_resolved(mod_file)
+            self.mods, errors = locked, []
+        else:
+            self.mods, errors = await self.__resolve_mods(self.manifest.get("files"), on_resolved)
+        self.events.emit("mod_load_end")
+        await asyncio.gather(*downloads)
+
+        self.events.emit("download_end")
+        return errors
+
+    async def download(self, destination: str, pipelined: bool = True):
+        """
+        Awaitable version of DownloadManager.download, resolution and downloads share the event loop
+        and every mod is downloaded as soon as it is resolved
+        (Emits events during run & makes many web requests)
+
+        :param destination:             path where the ModPack should be downloaded to
+        :param pipelined:               only for compatibility with DownloadManager.download, mods are always downloaded once resolved
+        :return:                        None
+        """
+        self.events.emit("process_start")
+
+        try:
+            with self._measure() as metrics:
+                with metrics.phase("manifest"):
+                    self.manifest = await asyncio.to_thread(self.get_manifest)
+                with metrics.phase("resolve_and_download"):
+                    errors = await self.__resolve_and_download_mods(os.path.join(destination, "mods"))
+                self._add_resolve_errors(errors)
+
+                with metrics.phase("overrides"):
+                    await asyncio.to_thread(self._finish_install, destination)
+        finally:
+            if self.__owns_client:
+                await self.client.close()
+
+        self.events.emit("process_end", metrics)
+        # the dispatcher waits for slow subscribers, the loop must not
+        await asyncio.to_thread(self.events.flush)
+
+    def download_sync(self, destination: str):
+        """
+        Runs self.download on a new event loop and blocks until it has finished
+
+        :param destination:             path where the ModPack should be downloaded to
+        :return:                        None
+        """
+        asyncio.run(self.download(destination))
+
+    def initialize(self, destination: str, listeners: dict[str, callable] = None, *args, **kwargs) -> threading.Thread:
+        """
+        Initializes a Thread running its own event loop for self.download
+
+        :param destination:             path where the ModPack should be downloaded to
+        :param listeners:               dict with callbacks mapped to event listener channels
+        :param args:                    additional args for threading.Thread
+        :param kwargs:                  additional kwargs for threading.Thread
+        :return:                        threading.Thread
+        """
+        if listeners is not None:
+            for channel, callback in listeners.items():
+                self.register_listener(channel, callback)
+
+        self.thread = threading.Thread(*args, target=self.download_sync, args=(destination,), **kwargs)
+        return self.thread
+
+
+async def install(mod_pack: str, destination: str, listeners: dict[str, callable] = None, cache: MetadataCache = None, client: AsyncHttpClient = None) -> list:
+    """
+    Downloads (if mod_pack is a url) and installs a mod-pack with the async engine
+
+    :param mod_pack:                    Mod Pack location (can be: url, .zip file, folder with manifest.json)
+    :param destination:                 path where the ModPack should be downloaded to
+    :param listeners:                   dict with callbacks mapped to event listener channels
+    :param cache:                       persistent metadata cache used while resolving mods
+    :param client:                      shared async HTTP client (a new one is created and closed if None)
+    :return:                            errors of the DownloadManager
+    """
+    owns_client = client is None
+    client = client or AsyncHttpClient()
+    try:
+        pack = await AsyncModPack(mod_pack, cache=cache, client=client).load()
+        location = await pack.download_file(pack.get_latest_file()) if pack.is_url() else mod_pack
+
+        async with AsyncDownloadManager(location, cache=cache, client=client) as d_mgr:
+            for channel, callback in (listeners or {}).items():
+                d_mgr.register_listener(channel, callback)
+            await d_mgr.download(destination)
+            return d_mgr.errors
+    finally:
+        if owns_client:
+            await client.close()
+
+
+def install_sync(mod_pack: str, destination: str, listeners: dict[str, callable] = None, cache: MetadataCache = None) -> list:
+    """
+    Blocking wrapper around install() for synchronous code (runs a new event loop)
+
+    :param mod_pack:                    Mod Pack location (can be: url, .zip file, folder with manifest.json)
+    :param destination:                 path where the ModPack should be downloaded to
+    :param listeners:                   dict with callbacks mapped to event listener channels
+    :param cache:                       persistent metadata cache used while resolving mods
+    :return:                            errors of the DownloadManager
+    """
+    return asyncio.run(install(mod_pack, destination, listeners, cache))
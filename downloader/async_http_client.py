@@ -0,0 +1,110 @@
+import time
+import asyncio
+from urllib.parse import urlparse
+
+import aiohttp
+
+import configuration
+from downloader.retry import RetryPolicy, RETRY_STATUSES
+from downloader.metrics import current_metrics
+
+
+class AsyncHttpClient:
+    def __init__(self, connections: int = None, connections_per_host: int = None, timeout: float = None, headers: dict = None, retry: RetryPolicy = None):
+        """
+        asyncio counterpart of downloader.http_client.HttpClient on aiohttp\n
+        Any number of requests can be awaited at once, the connector keeps at most `connections` open
+        and queues the others. Retries, backoff, Retry-After pauses, circuit breakers and the api rate limit
+        follow the RetryPolicy (which may be shared with a sync HttpClient).
+        The session is created on first use inside the running event loop.
+
+        :param connections:             max open connections (defaults to configuration.async_connections)
+        :param connections_per_host:    max open connections per host (defaults to configuration.async_connections_per_host)
+        :param timeout:                 timeout in seconds for connecting and for every read (defaults to configuration.request_timeout)
+        :param headers:                 headers sent with every request (defaults to configuration.request_headers)
+        :param retry:                   retry and rate limit policy applied to every request
+        """
+        self.connections = connections or configuration.async_connections
+        self.connections_per_host = connections_per_host or configuration.async_connections_per_host
+        self.timeout = timeout or configuration.request_timeout
+        self.headers = configuration.request_headers if headers is None else headers
+        self.retry = retry or RetryPolicy()
+        self.session = None
+
+    async def __aenter__(self):
+        self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def open(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.connections, limit_per_host=self.connections_per_host),
+                timeout=aiohttp.ClientTimeout(sock_connect=self.timeout, sock_read=self.timeout),
+                headers=self.headers
+            )
+        return self.session
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    @staticmethod
+    def api_url(path: str) -> str:
+        return f"{configuration.c_forge_api}/{path}"
+
+    async def request(self, method: str, url: str, **kwargs) -> aiohttp.ClientResponse:
+        """
+        Sends a request according to the RetryPolicy, the response has to be released by the caller
+        (use it as `async with await client.get(url) as resp:`)
+
+        :param method:                  HTTP method
+        :param url:                     url of the request
+        :param kwargs:                  additional kwargs for aiohttp.ClientSession.request
+        :return:                        the last response (may have a failed status if all retries were used)
+        """
+        session = self.open()
+        kind = "api" if url.startswith(configuration.c_forge_api) else "download"
+        host = urlparse(url).netloc
+        metrics = current_metrics()
+        for attempt in range(self.retry.max_retries + 1):
+            wait = self.retry.before_attempt(host)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if kind == "api":
+                while (wait := self.retry.bucket.reserve()) > 0:
+                    await asyncio.sleep(wait)
+
+            last = attempt == self.retry.max_retries
+            start = time.monotonic()
+            try:
+                resp = await session.request(method, url, **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                self.retry.record(host, False)
+                if last:
+                    raise
+                self.retry.count_retry(None if metrics is None else metrics.add_retry)
+                await asyncio.sleep(self.retry.delay(attempt))
+                continue
+            if metrics is not None:
+                metrics.observe_request(kind, time.monotonic() - start)
+
+            if resp.status not in RETRY_STATUSES:
+                self.retry.record(host, resp.status < 500)
+                return resp
+            self.retry.record(host, False)
+            if last:
+                return resp
+            delay = self.retry.retry_delay(host, attempt, resp.status, self.retry.retry_after(resp))
+            resp.release()
+            self.retry.count_retry(None if metrics is None else metrics.add_retry)
+            await asyncio.sleep(delay)
+
+    async def get(self, url: str, **kwargs) -> aiohttp.ClientResponse:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> aiohttp.ClientResponse:
+        return await self.request("POST", url, **kwargs)
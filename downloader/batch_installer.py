@@ -0,0 +1,132 @@
+import os
+import tempfile
+from shutil import rmtree
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import configuration
+
+from downloader.modpack_repository import ModPack
+from downloader.mod_repository import ModRepository
+from downloader.metadata_cache import MetadataCache
+from downloader.http_client import HttpClient, default_client
+from downloader.jar_store import JarStore
+from downloader.events import EventBus
+from downloader.curseforge_downloader import DownloadManager
+
+
+class BatchInstaller:
+    def __init__(
+        self,
+        packs: list[tuple[str, str]],
+        store: JarStore = None,
+        cache: MetadataCache = None,
+        client: HttpClient = None,
+        workers: int = None,
+        events: EventBus = None
+    ):
+        """
+        Installs several mod-packs at once, mods used by more than one pack are resolved and downloaded only once
+        and linked into every install from a shared JarStore
+
+        :param packs:                   (mod-pack location, destination) pairs (location can be: url, .zip file, folder with manifest.json)
+        :param store:                   shared jar store (defaults to a temporary store which is removed afterwards)
+        :param cache:                   persistent metadata cache used while resolving mods
+        :param client:                  shared HTTP client (defaults to downloader.http_client.default_client())
+        :param workers:                 number of parallel download workers (defaults to configuration.download_workers)
+        :param events:                  event bus the listeners of all packs are registered on
+                                        (a bus passed in is left open, the own bus is closed after install())
+        """
+        self.packs = packs
+        self.store = store
+        self.cache = cache
+        self.client = client or default_client()
+        self.workers = workers or configuration.download_workers
+        self.events = events or EventBus()
+        self.errors = {}
+
+        self.__owns_events = events is None
+
+    def register_listener(self, channel: str, callback: callable):
+        self.events.subscribe(channel, callback)
+
+    def __open(self, location: str) -> DownloadManager:
+        mod_pack = ModPack(location, cache=self.cache, client=self.client)
+        if mod_pack.is_url():
+            location = mod_pack.download_file(mod_pack.get_latest_file())
+        return DownloadManager(
+            location, workers=self.workers, cache=self.cache, client=self.client, events=self.events, store=self.store
+        )
+
+    def install(self) -> dict[str, list]:
+        """
+        Resolves all mod-packs, downloads every distinct mod file once and installs all packs
+        (Emits events during run & makes many web requests)
+
+        :return:                        errors of every destination
+        """
+        if not self.packs:
+            return self.errors
+
+        temp_store = None
+        if self.store is None:
+            temp_store = tempfile.mkdtemp()
+            self.store = JarStore(temp_store)
+
+        managers = []
+        try:
+            self.events.emit("batch_resolve_start", len(self.packs))
+            for location, destination in self.packs:
+                managers.append((self.__open(location), destination))
+
+            files = {}
+            for manager, _ in managers:
+                manager.manifest = manager.get_manifest()
+                for file in manager.manifest.get("files"):
+                    if file.get("required"):
+                        files.setdefault((file.get("projectID"), file.get("fileID")), file)
+
+            mods, errors = ModRepository(
+                list(files.values()),
+                progress=lambda done, total: self.events.emit("mod_load_progress", done, total),
+                cache=self.cache,
+                client=self.client
+            ).get()
+            resolved = {(mod.mod_id, mod.file_id): mod for mod in mods}
+            failed = {(error[0], error[1]) for error in errors}
+            self.events.emit("batch_resolve_end", len(files), len(mods))
+
+            self.events.emit("batch_download_start", len(mods))
+            downloader = managers[0][0]
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = {pool.submit(downloader._store_mod, mod): mod for mod in mods}
+                stored = set()
+                for future in as_completed(futures):
+                    mod = futures[future]
+                    try:
+                        if future.result() is not None:
+                            stored.add((mod.mod_id, mod.file_id))
+                    except Exception as e:
+                        downloader._add_error((mod.get().get("name"), None, str(e)))
+            download_errors = {error[0]: error for error in downloader.errors}
+            downloader.errors = []
+            self.events.emit("batch_download_end")
+
+            for manager, destination in managers:
+                keys = [(file.get("projectID"), file.get("fileID")) for file in manager.manifest.get("files") if file.get("required")]
+                manager.mods = [resolved[key] for key in keys if key in stored]
+                manager._add_resolve_errors([key for key in keys if key in failed])
+                for key in keys:
+                    if key in resolved and resolved[key].get().get("name") in download_errors:
+                        manager._add_error(download_errors[resolved[key].get().get("name")])
+                manager._download_mods(os.path.join(destination, "mods"))
+                manager._finish_install(destination)
+                self.errors[destination] = manager.errors
+        finally:
+            for manager, _ in managers:
+                manager.source.close()
+            if self.__owns_events:
+                self.events.close()
+            if temp_store is not None:
+                rmtree(temp_store)
+                self.store = None
+        return self.errors
@@ -1,61 +1,79 @@
 import os
+import queue
+import hashlib
 import threading
-import zipfile
-import requests
-import tempfile
-from shutil import rmtree
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+import configuration
 
 from downloader.modpack_repository import ModPack
 from downloader.manifest_repository import ModManifest
 from downloader.mod_repository import ModRepository
-
-
-class _AllListeners:
-    def __init__(self, callback: callable):
-        self.callback = callback
-
-    def __setitem__(self, key, value):
-        pass
-
-    def get(self, _):
-        return self.callback
+from downloader.metadata_cache import MetadataCache
+from downloader.http_client import HttpClient, default_client
+from downloader.hashing import file_sha1, file_fingerprint
+from downloader.events import EventBus
+from downloader.pack_source import PackSource
+from downloader.lockfile import ModLock
+from downloader.jar_store import JarStore
+from downloader.install_state import InstallState, UpgradePlan
+from downloader.segmented import segmented_download
+from downloader.metrics import Metrics, collect, with_current
+from downloader.verify import VerifyReport, check_file, pool_context
 
 
 class DownloadManager:
-    def __init__(self, mod_pack: ModPack or str):
+    def __init__(self, mod_pack: ModPack or str, workers: int = None, connections_per_host: int = None, cache: MetadataCache = None, client: HttpClient = None, events: EventBus = None, lockfile: str or bool = None, store: JarStore = None):
         """
         Provides a contextmanager with various functionalities, the main ones
         being the download and initialize functions\n
         REMINDER: If you don't use self as context manager don't forget to self.finish() if all operations have finished.
 
         :param mod_pack:                Reference to the wanted mod-pack (can be: class ModPack, .zip file, folder with manifest.json)
+        :param workers:                 number of parallel download workers (defaults to configuration.download_workers)
+        :param connections_per_host:    max parallel downloads per host (defaults to configuration.connections_per_host)
+        :param cache:                   persistent metadata cache used while resolving mods
+        :param client:                  shared HTTP client (defaults to downloader.http_client.default_client())
+        :param events:                  event bus the listeners are registered on
+        :param lockfile:                install from this lockfile instead of resolving the mods if it matches the manifest
+                                        (True uses the default location next to the manifest, see self.lock_path())
+        :param store:                   shared jar store, mods are downloaded into it and linked into the destination
         """
         self.zip_file = None
         self.root_path = mod_pack
-        self.listeners = {}
+        self.events = events or EventBus()
         self.thread = None
         self.errors = []
+        self.workers = workers or configuration.download_workers
+        self.connections_per_host = connections_per_host or configuration.connections_per_host
+        self.cache = cache
+        self.client = client or default_client()
+        self.metrics = Metrics()
+
+        self.__lock = threading.Lock()
+        self.__host_slots = {}
 
         self.manifest = None
         self.mods = None
 
         if not os.path.isdir(mod_pack):
             self.zip_file = mod_pack
-            self.root_path = tempfile.mkdtemp()
+        self.source = PackSource.from_location(mod_pack)
+        self.lockfile = self.lock_path() if lockfile is True else lockfile
+        self.store = store
 
     def __enter__(self):
-        if self.zip_file is not None:
-            with zipfile.ZipFile(self.zip_file, "r") as zf:
-                zf.extractall(self.root_path)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.zip_file is not None:
-            rmtree(self.root_path)
+        self.events.close()
+        self.source.close()
 
     def finish(self):
         """
-        Removes temporary files and finishes.\n
+        Closes the mod-pack and finishes.\n
         REMINDER: Needn't be called if using self as context manager; must be called if not using self as context manager.
 
         :return:                        None
@@ -63,35 +81,29 @@ class DownloadManager:
         self.__exit__(None, None, None)
 
     def __call_listener(self, channel: str, *args, **kwargs):
-        func = self.listeners.get(channel)
-        if func is not None:
-            func(*args, **kwargs)
+        self.events.emit(channel, *args, **kwargs)
 
     def register_listener(self, channel: str, callback: callable):
         """
-        Adds a callback to a specific or all channels\n
-        WARNING: Event listeners are called synchronously thus will pause the download process
+        Adds a callback to a specific or all channels (multiple callbacks per channel are allowed)\n
+        Event listeners are called from a dispatcher thread and never pause the download process,
+        progress events are coalesced to at most one per configuration.progress_interval
 
         :param channel:                 The wanted listening channel (can be "all" to apply same callback to all channels)
         :param callback:                The callback function which is called on event occurrence on specified channel(s)
         :return:                        None
         """
-        if channel == "all":
-            self.listeners = _AllListeners(callback)
-        if type(self.listeners) == dict:
-            self.listeners[channel] = callback
+        self.events.subscribe(channel, callback)
 
-    def remove_listener(self, channel: str = "all"):
+    def remove_listener(self, channel: str = "all", callback: callable = None):
         """
         Removes an established event-listener from a specific or all channels
 
         :param channel:                 The targeted listening channel (can be "all" to remove from all channels)
+        :param callback:                The callback to remove (removes all callbacks of the channel if None)
         :return:                        None
         """
-        if channel == "all":
-            self.listeners = {}
-        else:
-            del self.listeners[channel]
+        self.events.unsubscribe(channel, callback)
 
     def get_manifest(self) -> ModManifest:
         """
@@ -102,75 +114,554 @@ class DownloadManager:
         """
         self.__call_listener("manifest_load_start")
         manifest = ModManifest(
-            os.path.join(self.root_path, "manifest.json")
+            content=self.source.read("manifest.json")
         )
         self.__call_listener("manifest_load_end")
         return manifest
 
-    def get_mod_list(self) -> tuple[ModRepository, list]:
+    def get_mod_list(self, on_resolved: callable = None, files: list[dict] = None) -> tuple[ModRepository, list]:
         """
         Gets all mods from ModPack's mod list
         (Emits events during run & makes many web requests)
 
+        :param on_resolved:             callback called with every Mod as soon as it is resolved
+        :param files:                   only resolve these manifest files (defaults to all files of the manifest)
         :return:                        downloader.mod_repository.ModRepository
         """
         self.__call_listener("mod_load_start")
-        repo, errors = ModRepository(
-            self.get_manifest().get("files"),
-            progress=self.listeners.get("mod_load_progress")
-        ).get()
+        locked = self._get_locked_mods(files)
+        if locked is not None:
+            for mod in locked:
+                if on_resolved is not None:
+                    on_resolved(mod)
+            self.__call_listener("mod_load_end")
+            return locked, []
+
+        repo, errors = self._resolve_mods(self.get_manifest().get("files") if files is None else files, on_resolved)
         self.__call_listener("mod_load_end")
         return repo, errors
 
-    def _download_file(self, url: str, to: str, name: str):
-        path = os.path.join(to, name)
-        if not os.path.exists(to):
-            os.makedirs(to)
+    def _resolve_mods(self, files: list[dict], on_resolved: callable = None) -> tuple[list, list]:
+        return ModRepository(
+            files,
+            progress=lambda done, total: self.__call_listener("mod_load_progress", done, total),
+            on_resolved=on_resolved,
+            cache=self.cache,
+            client=self.client
+        ).get()
+
+    def lock_path(self) -> str:
+        """
+        Returns the default lockfile location next to the manifest
+        (manifest.lock.json in a mod-pack folder, <file>.lock.json next to a .zip file)
+
+        :return:                        path of the lockfile
+        """
+        if self.zip_file is not None:
+            return f"{self.zip_file}.lock.json"
+        return os.path.join(self.root_path, "manifest.lock.json")
+
+    def _get_locked_mods(self, files: list[dict] = None) -> list or None:
+        # the locked mods of files (all files if None) or None if there is no valid lockfile
+        if self.lockfile is None or not os.path.isfile(self.lockfile):
+            return
+        lock = ModLock.load(self.lockfile)
+        if lock.is_stale(self.source.read("manifest.json")):
+            self.__call_listener("lock_stale", self.lockfile)
+            return
+        if files is None:
+            return lock.get_mods()
+        wanted = {(file.get("projectID"), file.get("fileID")) for file in files}
+        return [mod for mod in lock.get_mods() if (mod.mod_id, mod.file_id) in wanted]
+
+    def export_lock(self, path: str = None) -> str:
+        """
+        Writes the resolved mod list to a lockfile which allows installing without any metadata requests\n
+        Raises a ConnectionError instead of writing a partial lock if any required file of the manifest is unresolved.
+        (Resolves the mod list first if necessary)
 
-        resp = requests.get(url, stream=True)
-        if not resp.status_code == 200:
-            self.errors.append(
-                (name, resp.status_code, resp.reason)
+        :param path:                    location of the lockfile (defaults to self.lock_path())
+        :return:                        path of the lockfile
+        """
+        if self.mods is None:
+            self.mods, _ = self.get_mod_list()
+        unresolved = self.unresolved_files()
+        if unresolved:
+            raise ConnectionError("UnresolvedMods", unresolved)
+
+        path = path or self.lock_path()
+        ModLock.from_mods(self.source.read("manifest.json"), self.mods).save(path)
+        return path
+
+    def unresolved_files(self) -> list[tuple[int, int]]:
+        """
+        Returns the required files of the manifest which are missing from the resolved mod list
+        (e.g. because their lookup failed)
+
+        :return:                        list of (projectID, fileID)
+        """
+        if self.manifest is None:
+            self.manifest = self.get_manifest()
+        resolved = {(mod.mod_id, mod.file_id) for mod in self.mods or []}
+        return [
+            (file.get("projectID"), file.get("fileID")) for file in self.manifest.get("files")
+            if file.get("required") and (file.get("projectID"), file.get("fileID")) not in resolved
+        ]
+
+    def _add_error(self, error: tuple):
+        with self.__lock:
+            self.errors.append(error)
+
+    def _add_resolve_errors(self, errors: list):
+        # files which could not be resolved are failed installs too, not only events
+        for mod_id, file_id in errors:
+            self._add_error((f"file '{file_id}' of project '{mod_id}'", None, "Could not be resolved"))
+            self.__call_listener("process_error", f"Error while resolving file '{file_id}' from project '{mod_id}'", halt=True)
+
+    def __host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc
+        with self.__lock:
+            if host not in self.__host_slots:
+                self.__host_slots[host] = threading.BoundedSemaphore(self.connections_per_host)
+            return self.__host_slots[host]
+
+    @staticmethod
+    def _is_present(path: str, size: int = None, sha1: str = None) -> bool:
+        if not os.path.isfile(path):
+            return False
+        if size is not None:
+            return os.path.getsize(path) == size
+        if sha1 is not None:
+            return file_sha1(path) == sha1
+        return False
+
+    def __fetch(self, url: str, part_path: str, name: str, size: int = None) -> str or None:
+        # returns the SHA-1 of the downloaded part, "" if the transfer was cut off (the part can be resumed,
+        # failed segmented transfers are retried from scratch) or None if the download failed (the error is recorded)
+        offset = os.path.getsize(part_path) if os.path.isfile(part_path) else 0
+        if size is not None and offset > size:
+            # a stale part of another file can't be resumed
+            os.remove(part_path)
+            offset = 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        if not offset and (size or 0) >= configuration.segmented_threshold:
+            try:
+                if segmented_download(
+                    self.client, url, part_path,
+                    progress=lambda done, total: self.__call_listener("download_file_progress", done, total, name),
+                    slot=self.__host_slot(url)
+                ):
+                    self.metrics.add_bytes(os.path.getsize(part_path))
+                    return file_sha1(part_path)
+            except OSError:
+                # the segments of a preallocated file can't be resumed
+                if os.path.isfile(part_path):
+                    os.remove(part_path)
+                return ""
+
+        with self.__host_slot(url):
+            try:
+                resp = self.client.get(url, stream=True, headers=headers)
+            except OSError as e:
+                self._add_error((name, None, str(e)))
+                return
+            with resp:
+                if resp.status_code == 416 and offset == size:
+                    return file_sha1(part_path)
+                if resp.status_code == 416:
+                    # the part doesn't fit the file on the server, the retry starts from scratch
+                    os.remove(part_path)
+                    return ""
+                if resp.status_code not in (200, 206):
+                    self._add_error(
+                        (name, resp.status_code, resp.reason)
+                    )
+                    return
+                if resp.status_code == 200:
+                    offset = 0
+
+                sha1 = hashlib.sha1()
+                if offset:
+                    with open(part_path, "rb") as f:
+                        for block in iter(lambda: f.read(configuration.download_chunk_size), b""):
+                            sha1.update(block)
+
+                total = offset + int(resp.headers.get('content-length', 0))
+                written = offset
+                with open(part_path, "ab" if offset else "wb") as f:
+                    try:
+                        for data in resp.iter_content(chunk_size=configuration.download_chunk_size):
+                            sha1.update(data)
+                            written += f.write(data)
+                            self.metrics.add_bytes(len(data))
+                            self.__call_listener("download_file_progress", written, total, name)
+                    except OSError:
+                        return ""
+
+        if size is not None and written != size:
+            return ""
+        return sha1.hexdigest()
+
+    def _download_file(
+        self, url: str, to: str, name: str, size: int = None, sha1: str = None, fingerprint: int = None, file_name: str = None
+    ) -> bool:
+        path = os.path.join(to, file_name or name)
+        part_path = path + ".part"
+        os.makedirs(to, exist_ok=True)
+
+        if self._is_present(path, size, sha1):
+            self.__call_listener("download_file_skipped", name)
+            return True
+
+        for attempt in range(configuration.verify_retries + 1):
+            digest = self.__fetch(url, part_path, name, size)
+            if digest is None:
+                return False
+            if digest == "":
+                reason = "Incomplete download"
+                self.__call_listener("download_interrupted", name, attempt + 1)
+                continue
+            if sha1 is not None:
+                valid = digest == sha1
+            elif fingerprint is not None:
+                valid = file_fingerprint(part_path) == fingerprint
+            else:
+                valid = True
+
+            if valid:
+                os.replace(part_path, path)
+                return True
+            os.remove(part_path)
+            reason = "Checksum mismatch"
+            self.__call_listener("download_verify_error", name, attempt + 1)
+
+        self._add_error((name, None, f"{reason} after {configuration.verify_retries + 1} attempts"))
+        return False
+
+    def _download_mod(self, mod_file, to: str):
+        file = mod_file.get()
+        if self.store is None:
+            self._download_file(
+                file.get("url"), to, file.get("name"),
+                size=file.get("size"), sha1=file.get("sha1"), fingerprint=file.get("fingerprint")
             )
             return
-        total = int(resp.headers.get('content-length', 0))
-        size = 0
-        with open(path, "wb") as f:
-            for data in resp.iter_content(chunk_size=1024):
-                size += f.write(data)
-                self.__call_listener("download_file_progress", size, total)
+
+        target = os.path.join(to, file.get("name"))
+        if self._is_present(target, file.get("size"), file.get("sha1")):
+            self.__call_listener("download_file_skipped", file.get("name"))
+            return
+
+        for _ in range(2):
+            key = self._store_mod(mod_file)
+            if key is None:
+                return
+            try:
+                self.__call_listener("download_file_linked", file.get("name"), self.store.place(key, target))
+                return
+            except FileNotFoundError:
+                # the entry was collected (JarStore.gc) by another process before it could be placed, store it again
+                continue
+
+    def _store_mod(self, mod_file) -> str or None:
+        file = mod_file.get()
+        key = self.store.key(mod_file.mod_id, mod_file.file_id, file.get("sha1"))
+        if self.store.has(key):
+            return key
+
+        temp_path = self.store.temp_path(key)
+        try:
+            if not self._download_file(
+                file.get("url"), os.path.dirname(temp_path), file.get("name"),
+                size=file.get("size"), sha1=file.get("sha1"), fingerprint=file.get("fingerprint"),
+                file_name=os.path.basename(temp_path)
+            ):
+                return
+            self.store.commit(temp_path, key)
+        finally:
+            for path in (temp_path, temp_path + ".part"):
+                if os.path.isfile(path):
+                    os.remove(path)
+        return key
 
     def _download_mods(self, to: str):
         self.__call_listener("download_start")
 
         if self.manifest is None or self.mods is None:
             raise Exception("WrongOrderException", "functions called in wrong order leading to missing parameters")
-        for i, mod_file in enumerate(self.mods):
-            self.__call_listener("download_progress", i, len(self.mods), mod_file.get().get("name"))
-            self._download_file(mod_file.get().get("url"), to, mod_file.get().get("name"))
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {
+                pool.submit(with_current(self._download_mod), mod_file, to): mod_file
+                for mod_file in self.mods
+            }
+            for i, future in enumerate(as_completed(futures)):
+                try:
+                    future.result()
+                except Exception as e:
+                    # recorded like in the pipelined mode, the other downloads keep running
+                    self._add_error((futures[future].get().get("name"), None, str(e)))
+                self.__call_listener("download_progress", i + 1, len(self.mods), futures[future].get().get("name"))
 
         self.__call_listener("download_end")
 
-    def download(self, destination: str):
+    def _resolve_and_download_mods(self, to: str) -> list:
+        self.__call_listener("download_start")
+
+        total = len([file for file in self.manifest.get("files") if file.get("required")])
+        pending = queue.Queue(maxsize=configuration.pipeline_queue_size)
+        done = []
+
+        def worker():
+            while True:
+                mod_file = pending.get()
+                if mod_file is None:
+                    return
+                try:
+                    self._download_mod(mod_file, to)
+                except Exception as e:
+                    # a dead worker would leave the bounded queue unconsumed and block the resolvers
+                    self._add_error((mod_file.get().get("name"), None, str(e)))
+                with self.__lock:
+                    done.append(mod_file)
+                    self.__call_listener("download_progress", len(done), total, mod_file.get().get("name"))
+
+        workers = [threading.Thread(target=with_current(worker), daemon=True) for _ in range(self.workers)]
+        for thread in workers:
+            thread.start()
+        try:
+            self.mods, errors = self.get_mod_list(on_resolved=pending.put)
+        finally:
+            for _ in workers:
+                pending.put(None)
+            for thread in workers:
+                thread.join()
+
+        self.__call_listener("download_end")
+        return errors
+
+    def apply_overrides(self, destination: str, workers: int = None) -> list[str]:
+        """
+        Streams the contents of the mod-pack's overrides folder into the destination
+        (Emits events during run)
+
+        :param destination:             path where the ModPack should be downloaded to
+        :param workers:                 number of files copied in parallel (defaults to configuration.override_workers)
+        :return:                        paths of the copied files relative to destination
+        """
+        if self.manifest is None:
+            self.manifest = self.get_manifest()
+
+        self.__call_listener("overrides_start")
+        copied = self.source.copy_folder(self.__overrides_folder(), destination, workers=workers)
+        self.__call_listener("overrides_end", len(copied))
+        return copied
+
+    def __overrides_folder(self) -> str:
+        return self.manifest.data.get("overrides") or "overrides"
+
+    def __save_state(self, destination: str, mods: list[dict]):
+        failed = {error[0] for error in self.errors}
+        InstallState(
+            [mod for mod in mods if mod.get("name") not in failed],
+            self.source.checksums(self.__overrides_folder())
+        ).save(destination)
+
+    @staticmethod
+    def __mod_states(mods: list) -> list[dict]:
+        return [{"projectID": mod.mod_id, "fileID": mod.file_id, "name": mod.get().get("name")} for mod in mods]
+
+    def download(self, destination: str, pipelined: bool = False):
         """
         Starts downloading all mods to a "mods" folder in the specified destination
-        and moves "override" contents from manifest.json to destination
+        and moves "override" contents from manifest.json to destination\n
+        Mods already present with the expected size (or hash) are skipped, interrupted downloads are resumed.
+        Timings, request latencies and transfer counters of the run are available as self.metrics afterwards.
         (Emits events during run & makes many web requests)
 
         :param destination:             path where the ModPack should be downloaded to
+        :param pipelined:               start downloading every mod as soon as it is resolved instead of
+                                        resolving the whole mod list first (the download queue is bounded by
+                                        configuration.pipeline_queue_size)
         :return:                        None
         """
         self.__call_listener("process_start")
 
-        self.manifest = self.get_manifest()
-        self.mods, errors = self.get_mod_list()
-
-        for error in errors:
-            self.__call_listener("process_error", f"Error while downloading file '{error[1]}' from project '{error[0]}", halt=True)
-
-        self._download_mods(os.path.join(destination, "mods"))
-
+        with self._measure() as metrics:
+            with metrics.phase("manifest"):
+                self.manifest = self.get_manifest()
+            if pipelined:
+                with metrics.phase("resolve_and_download"):
+                    errors = self._resolve_and_download_mods(os.path.join(destination, "mods"))
+            else:
+                with metrics.phase("resolve"):
+                    self.mods, errors = self.get_mod_list()
+
+            self._add_resolve_errors(errors)
+
+            if not pipelined:
+                with metrics.phase("download"):
+                    self._download_mods(os.path.join(destination, "mods"))
+            with metrics.phase("overrides"):
+                self._finish_install(destination)
+
+        self.__call_listener("process_end", metrics)
+        self.events.flush()
+
+    @contextmanager
+    def _measure(self) -> Metrics:
+        # collects the metrics of one run into a fresh self.metrics, requests and cache lookups of the run
+        # (also on its worker threads, see downloader.metrics.with_current) record into it through the context
+        self.metrics = Metrics()
+        with collect(self.metrics), self.metrics.phase("total"):
+            yield self.metrics
+
+    def _finish_install(self, destination: str):
+        self.apply_overrides(destination)
+        self.__save_state(destination, self.__mod_states(self.mods))
+
+    def upgrade(self, destination: str, dry_run: bool = False) -> UpgradePlan:
+        """
+        Upgrades an existing install to this mod-pack by only downloading added or changed mods,
+        removing obsolete mods and updating changed override files\n
+        Installs without a recorded state (.modpack-install.json) are upgraded as a fresh download.
+        (Emits events during run & makes web requests for changed mods only)
+
+        :param destination:             path of the existing install
+        :param dry_run:                 only create and report the plan without changing anything
+        :return:                        downloader.install_state.UpgradePlan
+        """
+        self.__call_listener("process_start")
+        with self._measure() as metrics:
+            with metrics.phase("manifest"):
+                self.manifest = self.get_manifest()
+                files = [file for file in self.manifest.get("files") if file.get("required")]
+                overrides = self.source.checksums(self.__overrides_folder())
+
+            with metrics.phase("plan"):
+                state = InstallState.load(destination) or InstallState()
+                plan = UpgradePlan.create(state, files, overrides)
+            self.__call_listener("upgrade_plan", plan)
+            if dry_run or plan.is_empty():
+                self.events.flush()
+                return plan
+
+            mods_path = os.path.join(destination, "mods")
+            with metrics.phase("resolve"):
+                added, errors = self.get_mod_list(files=plan.added) if plan.added else ([], [])
+            self._add_resolve_errors(errors)
+
+            added_names = {mod.get().get("name") for mod in added}
+            for mod in plan.removed:
+                path = os.path.join(mods_path, mod.get("name"))
+                if mod.get("name") not in added_names and os.path.isfile(path):
+                    os.remove(path)
+
+            self.mods = added
+            with metrics.phase("download"):
+                self._download_mods(mods_path)
+
+            with metrics.phase("overrides"):
+                for name in plan.removed_overrides:
+                    path = os.path.join(destination, name)
+                    if os.path.isfile(path):
+                        os.remove(path)
+                self.__call_listener("overrides_start")
+                self.source.copy_folder(self.__overrides_folder(), destination, names=plan.changed_overrides)
+                self.__call_listener("overrides_end", len(plan.changed_overrides))
+
+                self.__save_state(destination, plan.kept + self.__mod_states(added))
+
+        self.__call_listener("process_end", metrics)
+        self.events.flush()
+        return plan
+
+    def verify(self, destination: str, repair: bool = True, remove_extra: bool = True, workers: int = None) -> VerifyReport:
+        """
+        Checks the mods folder of an existing install against the resolved mod list and repairs it\n
+        Every present mod is hashed on a process pool (large files through memory maps), only missing
+        and corrupt mods are downloaded again. The mod list is resolved first if necessary (with a lockfile
+        no metadata requests are made), manifest files which can't be resolved are reported as unresolved
+        and extra files are kept while there are any since they may belong to them.
+        (Emits events during run & makes web requests for the metadata and repaired mods only)
+
+        :param destination:             path of the existing install
+        :param repair:                  download missing and corrupt mods (and remove extra files)
+        :param remove_extra:            remove files of the mods folder which are not part of the mod-pack when repairing
+        :param workers:                 number of hashing processes (defaults to configuration.verify_workers)
+        :return:                        downloader.verify.VerifyReport
+        """
         self.__call_listener("process_start")
+        mods_path = os.path.join(destination, "mods")
+
+        with self._measure() as metrics:
+            if self.mods is None:
+                with metrics.phase("resolve"):
+                    self.manifest = self.get_manifest()
+                    self.mods, errors = self.get_mod_list()
+                self._add_resolve_errors(errors)
+
+            expected = {mod.get().get("name"): mod for mod in self.mods}
+            present = {
+                name for name in (os.listdir(mods_path) if os.path.isdir(mods_path) else [])
+                if not name.endswith(".part") and os.path.isfile(os.path.join(mods_path, name))
+            }
+            missing = [name for name in expected if name not in present]
+            extra = sorted(present - expected.keys())
+            valid, corrupt = [], []
+
+            self.__call_listener("verify_start")
+            with metrics.phase("verify"), ProcessPoolExecutor(max_workers=workers or configuration.verify_workers, mp_context=pool_context()) as pool:
+                futures = {
+                    pool.submit(
+                        check_file, os.path.join(mods_path, name), file.get("size"), file.get("sha1"),
+                        file.get("fingerprint"), configuration.mmap_threshold
+                    ): name
+                    for name, file in ((name, mod.get()) for name, mod in expected.items()) if name in present
+                }
+                for i, future in enumerate(as_completed(futures)):
+                    try:
+                        (valid if future.result() else corrupt).append(futures[future])
+                    except OSError:
+                        # removed or unreadable since the folder was listed, repaired like the others
+                        path = os.path.join(mods_path, futures[future])
+                        (corrupt if os.path.exists(path) else missing).append(futures[future])
+                    self.__call_listener("verify_progress", i + 1, len(futures), futures[future])
+
+            report = VerifyReport(sorted(valid), missing, sorted(corrupt), extra, self.unresolved_files())
+            self.__call_listener("verify_end", report)
+
+            if repair and not report.is_healthy():
+                with metrics.phase("repair"):
+                    self.__repair(report, expected, mods_path, remove_extra)
+
+        self.__call_listener("process_end", metrics)
+        self.events.flush()
+        return report
+
+    def __repair(self, report: VerifyReport, expected: dict, mods_path: str, remove_extra: bool):
+        if remove_extra and not report.unresolved:
+            for name in report.extra:
+                os.remove(os.path.join(mods_path, name))
+                report.removed.append(name)
+        for name in report.corrupt:
+            os.remove(os.path.join(mods_path, name))
+            if self.store is not None:
+                # a hardlinked store entry shares the corrupt data
+                mod = expected[name]
+                stored = self.store.path(self.store.key(mod.mod_id, mod.file_id, mod.get().get("sha1")))
+                if os.path.isfile(stored):
+                    os.remove(stored)
+
+        mods, self.mods = self.mods, [expected[name] for name in report.missing + report.corrupt]
+        if self.manifest is None:
+            self.manifest = self.get_manifest()
+        try:
+            self._download_mods(mods_path)
+        finally:
+            failed = {error[0] for error in self.errors}
+            report.repaired = [mod.get().get("name") for mod in self.mods if mod.get().get("name") not in failed]
+            self.mods = mods
 
     def initialize(self, destination: str, listeners: dict[str, callable] = None, *args, **kwargs) -> threading.Thread:
         """
@@ -185,7 +676,8 @@ class DownloadManager:
         import threading
 
         if listeners is not None:
-            self.listeners = listeners
+            for channel, callback in listeners.items():
+                self.register_listener(channel, callback)
 
         self.thread = threading.Thread(*args, target=self.download, args=(destination, *[]), **kwargs)
         return self.thread
@@ -0,0 +1,144 @@
+import queue
+import threading
+import traceback
+
+import configuration
+
+
+# channels whose events only describe the latest state and may be merged; maps channel to the position of the argument
+# that identifies the event source (None if the whole channel shares one state)
+COALESCED_CHANNELS = {
+    "mod_load_progress": None,
+    "download_progress": None,
+    "download_file_progress": 2
+}
+
+
+class EventBus:
+    def __init__(self, progress_interval: float = None):
+        """
+        Delivers events to subscribers on a separate dispatcher thread so slow subscribers never block the emitter\n
+        Events of progress channels (COALESCED_CHANNELS) are merged and delivered at most once per `progress_interval`
+        per source, only the latest state is delivered.
+
+        :param progress_interval:       seconds between deliveries of a progress channel (defaults to configuration.progress_interval, 0 delivers every event)
+        """
+        self.progress_interval = configuration.progress_interval if progress_interval is None else progress_interval
+        self.subscribers = {}
+
+        self.__queue = queue.Queue()
+        self.__pending = {}
+        self.__lock = threading.Lock()
+        self.__thread = None
+
+    def subscribe(self, channel: str, callback: callable):
+        """
+        Adds a callback to a specific or all channels
+
+        :param channel:                 The wanted listening channel (can be "all" to receive events of all channels)
+        :param callback:                The callback function which is called on event occurrence on specified channel(s)
+        :return:                        None
+        """
+        with self.__lock:
+            self.subscribers.setdefault(channel, []).append(callback)
+
+    def unsubscribe(self, channel: str = "all", callback: callable = None):
+        """
+        Removes callbacks from a channel
+
+        :param channel:                 The targeted listening channel ("all" without callback removes every subscriber)
+        :param callback:                The callback to remove (removes all callbacks of the channel if None)
+        :return:                        None
+        """
+        with self.__lock:
+            if channel == "all" and callback is None:
+                self.subscribers = {}
+            elif callback is None:
+                self.subscribers.pop(channel, None)
+            elif callback in self.subscribers.get(channel, []):
+                self.subscribers[channel].remove(callback)
+
+    def __callbacks(self, channel: str) -> list:
+        with self.__lock:
+            return self.subscribers.get(channel, []) + self.subscribers.get("all", [])
+
+    def emit(self, channel: str, *args, **kwargs):
+        """
+        Queues an event for delivery (Never blocks on subscribers)
+
+        :param channel:                 channel of the event
+        :param args:                    args passed to the subscribers
+        :param kwargs:                  kwargs passed to the subscribers
+        :return:                        None
+        """
+        if not self.__callbacks(channel):
+            return
+        self.__start()
+
+        if channel in COALESCED_CHANNELS and self.progress_interval:
+            source = COALESCED_CHANNELS[channel]
+            key = (channel, args[source] if source is not None and len(args) > source else None)
+            with self.__lock:
+                self.__pending[key] = (channel, args, kwargs)
+            return
+        self.__queue.put((channel, args, kwargs))
+
+    def flush(self):
+        """
+        Blocks until every event emitted so far has been delivered
+
+        :return:                        None
+        """
+        if self.__thread is None:
+            return
+        done = threading.Event()
+        self.__queue.put(done)
+        done.wait()
+
+    def close(self):
+        """
+        Delivers outstanding events and stops the dispatcher thread
+
+        :return:                        None
+        """
+        if self.__thread is None:
+            return
+        self.flush()
+        self.__queue.put(None)
+        self.__thread.join()
+        self.__thread = None
+
+    def __start(self):
+        with self.__lock:
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__dispatch, daemon=True)
+                self.__thread.start()
+
+    def __deliver(self, channel: str, args: tuple, kwargs: dict):
+        for callback in self.__callbacks(channel):
+            try:
+                callback(*args, **kwargs)
+            except Exception:
+                traceback.print_exc()
+
+    def __deliver_pending(self):
+        with self.__lock:
+            pending, self.__pending = self.__pending, {}
+        for event in pending.values():
+            self.__deliver(*event)
+
+    def __dispatch(self):
+        while True:
+            try:
+                event = self.__queue.get(timeout=self.progress_interval or None)
+            except queue.Empty:
+                self.__deliver_pending()
+                continue
+
+            self.__deliver_pending()
+            if event is None:
+                return
+            if isinstance(event, threading.Event):
+                event.set()
+                continue
+            self.__deliver(*event)
@@ -0,0 +1,88 @@
+import os
+import mmap
+import hashlib
+import struct
+
+
+def file_sha1(path: str, chunk_size: int = 1024 * 1024, mmap_threshold: int = None) -> str:
+    """
+    Returns the hex SHA-1 digest of a file
+
+    :param path:                        path of the file
+    :param chunk_size:                  size of the blocks read from disk
+    :param mmap_threshold:              files of at least this size are hashed from a memory map in one call
+                                        instead of being read block by block (None always reads blocks)
+    :return:                            hex digest
+    """
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if mmap_threshold is not None and size and size >= mmap_threshold:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                sha1.update(mapped)
+        else:
+            for block in iter(lambda: f.read(chunk_size), b""):
+                sha1.update(block)
+    return sha1.hexdigest()
+
+
+_WHITESPACE = bytes([9, 10, 13, 32])
+
+
+def murmur2(data: bytes, seed: int = 1) -> int:
+    """
+    32 bit MurmurHash2 as used by CurseForge
+
+    :param data:                        bytes to hash
+    :param seed:                        hash seed
+    :return:                            unsigned 32 bit hash
+    """
+    return _murmur2_blocks([data], len(data), seed)
+
+
+def _murmur2_blocks(blocks, length: int, seed: int = 1) -> int:
+    m = 0x5bd1e995
+    h = (seed ^ length) & 0xffffffff
+
+    tail = b""
+    for block in blocks:
+        if tail:
+            block = tail + block
+        aligned = len(block) - len(block) % 4
+        for (k,) in struct.iter_unpack("<I", memoryview(block)[:aligned]):
+            k = (k * m) & 0xffffffff
+            k ^= k >> 24
+            k = (k * m) & 0xffffffff
+            h = ((h * m) & 0xffffffff) ^ k
+        tail = block[aligned:]
+
+    if len(tail) == 3:
+        h ^= tail[2] << 16
+    if len(tail) >= 2:
+        h ^= tail[1] << 8
+    if len(tail) >= 1:
+        h ^= tail[0]
+        h = (h * m) & 0xffffffff
+
+    h ^= h >> 13
+    h = (h * m) & 0xffffffff
+    h ^= h >> 15
+    return h
+
+
+def file_fingerprint(path: str, chunk_size: int = 1024 * 1024) -> int:
+    """
+    Returns the CurseForge fingerprint (MurmurHash2 of the file without whitespace bytes) of a file\n
+    The hash is seeded with the length of the normalized data, so the file is read twice block by block:
+    once to count the non-whitespace bytes and once to hash them.
+
+    :param path:                        path of the file
+    :param chunk_size:                  size of the blocks read from disk
+    :return:                            fingerprint
+    """
+    with open(path, "rb") as f:
+        length = sum(len(block.translate(None, _WHITESPACE)) for block in iter(lambda: f.read(chunk_size), b""))
+        f.seek(0)
+        return _murmur2_blocks(
+            (block.translate(None, _WHITESPACE) for block in iter(lambda: f.read(chunk_size), b"")), length
+        )
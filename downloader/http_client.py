@@ -0,0 +1,96 @@
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+import configuration
+from downloader.retry import RetryPolicy
+from downloader.metrics import current_metrics
+
+
+class HttpClient:
+    def __init__(self, pool_hosts: int = None, pool_size: int = None, timeout: float = None, headers: dict = None, retry: RetryPolicy = None):
+        """
+        Shared HTTP client with keep-alive connection pooling\n
+        One instance should be shared by all downloader objects so connections are reused between them
+        and all of them back off together.
+
+        :param pool_hosts:              number of hosts to keep connection pools for (defaults to configuration.http_pool_hosts)
+        :param pool_size:               max pooled connections per host (defaults to configuration.http_pool_size)
+        :param timeout:                 timeout in seconds for connecting and reading (defaults to configuration.request_timeout)
+        :param headers:                 headers sent with every request (defaults to configuration.request_headers)
+        :param retry:                   retry and rate limit policy applied to every request
+        """
+        self.timeout = timeout or configuration.request_timeout
+        self.retry = retry or RetryPolicy()
+        self.session = requests.Session()
+        self.session.headers.update(configuration.request_headers if headers is None else headers)
+
+        adapter = HTTPAdapter(
+            pool_connections=pool_hosts or configuration.http_pool_hosts,
+            pool_maxsize=pool_size or configuration.http_pool_size
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    @staticmethod
+    def api_url(path: str) -> str:
+        """
+        Returns the full url of a CurseForge api path
+
+        :param path:                    path relative to configuration.c_forge_api
+        :return:                        url
+        """
+        return f"{configuration.c_forge_api}/{path}"
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        kind = "api" if url.startswith(configuration.c_forge_api) else "download"
+
+        metrics = current_metrics()
+
+        def send():
+            start = time.monotonic()
+            resp = self.session.request(method, url, **kwargs)
+            if metrics is not None:
+                metrics.observe_request(kind, time.monotonic() - start)
+            return resp
+
+        return self.retry.call(
+            url, send, rate_limited=kind == "api", on_retry=None if metrics is None else metrics.add_retry
+        )
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        return self.request("HEAD", url, **kwargs)
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def default_client() -> HttpClient:
+    """
+    Returns the process-wide HttpClient used when no client is passed explicitly
+
+    :return:                            downloader.http_client.HttpClient
+    """
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
@@ -0,0 +1,91 @@
+import os
+import json
+
+
+STATE_FILE = ".modpack-install.json"
+
+
+class InstallState:
+    def __init__(self, mods: list[dict] = None, overrides: dict[str, int] = None):
+        """
+        Record of what a DownloadManager installed into a destination (stored in <destination>/.modpack-install.json)
+
+        :param mods:                    installed mods (projectID, fileID, name)
+        :param overrides:               installed override files mapped to their CRC-32
+        """
+        self.mods = mods or []
+        self.overrides = overrides or {}
+
+    @staticmethod
+    def path(destination: str) -> str:
+        return os.path.join(destination, STATE_FILE)
+
+    @classmethod
+    def load(cls, destination: str) -> "InstallState" or None:
+        """
+        Loads the state of an install
+
+        :param destination:             path of the install
+        :return:                        downloader.install_state.InstallState or None if there is no recorded state
+        """
+        if not os.path.isfile(cls.path(destination)):
+            return
+        with open(cls.path(destination), "r") as f:
+            data = json.load(f)
+        return cls(data.get("mods"), data.get("overrides"))
+
+    def save(self, destination: str):
+        tmp_path = self.path(destination) + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"mods": self.mods, "overrides": self.overrides}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path(destination))
+
+    def mod_keys(self) -> dict[tuple[int, int], str]:
+        return {(mod.get("projectID"), mod.get("fileID")): mod.get("name") for mod in self.mods}
+
+
+class UpgradePlan:
+    def __init__(self, added: list[dict], removed: list[dict], kept: list[dict], changed_overrides: list[str], removed_overrides: list[str]):
+        """
+        Changes needed to upgrade an install to another mod-pack version
+
+        :param added:                   manifest files which have to be downloaded
+        :param removed:                 installed mods (projectID, fileID, name) which have to be removed
+        :param kept:                    installed mods which stay untouched
+        :param changed_overrides:       override files which are new or changed
+        :param removed_overrides:       override files which no longer exist in the new version
+        """
+        self.added = added
+        self.removed = removed
+        self.kept = kept
+        self.changed_overrides = changed_overrides
+        self.removed_overrides = removed_overrides
+
+    @classmethod
+    def create(cls, state: InstallState, files: list[dict], overrides: dict[str, int]) -> "UpgradePlan":
+        """
+        Diffs an install against the manifest files and overrides of a mod-pack
+
+        :param state:                   state of the existing install
+        :param files:                   required files of the new manifest
+        :param overrides:               override files of the new mod-pack mapped to their CRC-32
+        :return:                        downloader.install_state.UpgradePlan
+        """
+        installed = state.mod_keys()
+        wanted = {(file.get("projectID"), file.get("fileID")) for file in files}
+        return cls(
+            [file for file in files if (file.get("projectID"), file.get("fileID")) not in installed],
+            [mod for mod in state.mods if (mod.get("projectID"), mod.get("fileID")) not in wanted],
+            [mod for mod in state.mods if (mod.get("projectID"), mod.get("fileID")) in wanted],
+            [name for name, crc in overrides.items() if state.overrides.get(name) != crc],
+            [name for name in state.overrides if name not in overrides]
+        )
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed_overrides or self.removed_overrides)
+
+    def __str__(self):
+        return (
+            f"{len(self.added)} mods to download, {len(self.removed)} to remove, {len(self.kept)} unchanged; "
+            f"{len(self.changed_overrides)} override files to update, {len(self.removed_overrides)} to remove"
+        )
@@ -0,0 +1,134 @@
+import os
+import time
+import shutil
+import tempfile
+
+import configuration
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+_FICLONE = 0x40049409
+
+
+class JarStore:
+    def __init__(self, root: str = None):
+        """
+        Content-addressed store of mod files shared by all installs\n
+        Installs hardlink their jars from the store (or reflink / copy them if hardlinks are not possible),
+        so every file is only downloaded and stored once.
+
+        :param root:                    location of the store (defaults to configuration.store_path)
+        """
+        self.root = root or configuration.store_path
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def key(mod_id: int, file_id: int, sha1: str = None) -> str:
+        """
+        Returns the store key of a mod file (its SHA-1 if known, its project and file id otherwise)
+
+        :param mod_id:                  CurseForge project id
+        :param file_id:                 CurseForge file id
+        :param sha1:                    hex SHA-1 of the file
+        :return:                        store key
+        """
+        return sha1.lower() if sha1 else f"{mod_id}-{file_id}"
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def has(self, key: str) -> bool:
+        return os.path.isfile(self.path(key))
+
+    def temp_path(self, key: str) -> str:
+        """
+        Creates an empty file with a unique name next to the location of a key\n
+        Installs sharing the store download into their own temp file and move it into place with self.commit,
+        so they never resume or truncate each other's downloads.
+
+        :param key:                     store key of the file
+        :return:                        path of the temp file
+        """
+        folder = os.path.dirname(self.path(key))
+        os.makedirs(folder, exist_ok=True)
+        fd, path = tempfile.mkstemp(prefix=f"{key}.", suffix=".tmp", dir=folder)
+        os.close(fd)
+        return path
+
+    def commit(self, temp_path: str, key: str):
+        os.replace(temp_path, self.path(key))
+
+    @staticmethod
+    def __reflink(src: str, dst: str) -> bool:
+        if fcntl is None:
+            return False
+        try:
+            with open(src, "rb") as s, open(dst, "wb") as d:
+                fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+            return True
+        except OSError:
+            if os.path.exists(dst):
+                os.remove(dst)
+            return False
+
+    def place(self, key: str, target: str) -> str:
+        """
+        Places a stored file at target (replacing an existing file)
+
+        :param key:                     store key of the file
+        :param target:                  path the file should be placed at
+        :return:                        used method ("hardlink", "reflink" or "copy")
+        """
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = target + ".link"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        try:
+            os.link(self.path(key), tmp_path)
+            method = "hardlink"
+        except OSError:
+            if self.__reflink(self.path(key), tmp_path):
+                method = "reflink"
+            else:
+                shutil.copyfile(self.path(key), tmp_path)
+                method = "copy"
+        os.replace(tmp_path, target)
+        return method
+
+    def gc(self, grace: float = None) -> list[str]:
+        """
+        Removes all stored files which are not hardlinked by any install\n
+        Installs which reflinked or copied their files don't hold a reference, their files are removed too
+        and will be downloaded again the next time they are needed. Files changed within the last `grace` seconds
+        are kept since running installs may not have placed them yet, older temp files of aborted downloads are removed.
+
+        :param grace:                   seconds new files are kept (defaults to configuration.store_gc_grace)
+        :return:                        keys of the removed files
+        """
+        grace = configuration.store_gc_grace if grace is None else grace
+        cutoff = time.time() - grace
+        removed = []
+        for folder in os.listdir(self.root):
+            folder_path = os.path.join(self.root, folder)
+            if not os.path.isdir(folder_path):
+                continue
+            for key in os.listdir(folder_path):
+                path = os.path.join(folder_path, key)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if stat.st_mtime > cutoff:
+                    continue
+                if key.endswith((".tmp", ".part")):
+                    os.remove(path)
+                elif stat.st_nlink <= 1:
+                    os.remove(path)
+                    removed.append(key)
+            if not os.listdir(folder_path):
+                os.rmdir(folder_path)
+        return removed
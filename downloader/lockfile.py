@@ -0,0 +1,78 @@
+import os
+import json
+import hashlib
+
+from downloader.mod_repository import Mod
+
+
+LOCK_VERSION = 1
+
+
+class ModLock:
+    def __init__(self, manifest_digest: str, files: list[dict]):
+        """
+        Resolved mod list of a manifest which allows reinstalling without metadata requests
+
+        :param manifest_digest:         SHA-256 of the manifest.json the lock was resolved from
+        :param files:                   resolved files (projectID, fileID, name, url, size, sha1, fingerprint)
+        """
+        self.manifest_digest = manifest_digest
+        self.files = files
+
+    @staticmethod
+    def digest(manifest_content: bytes) -> str:
+        return hashlib.sha256(manifest_content).hexdigest()
+
+    @classmethod
+    def from_mods(cls, manifest_content: bytes, mods: list[Mod]) -> "ModLock":
+        """
+        Creates a lock from resolved mods
+
+        :param manifest_content:        raw contents of the manifest.json the mods were resolved from
+        :param mods:                    resolved mods
+        :return:                        downloader.lockfile.ModLock
+        """
+        return cls(cls.digest(manifest_content), [
+            {"projectID": mod.mod_id, "fileID": mod.file_id, **mod.get()} for mod in mods
+        ])
+
+    @classmethod
+    def load(cls, path: str) -> "ModLock":
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get("version") != LOCK_VERSION:
+            raise ValueError("UnsupportedLockVersion", data.get("version"))
+        return cls(data.get("manifest"), data.get("files"))
+
+    def save(self, path: str):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": LOCK_VERSION, "manifest": self.manifest_digest, "files": self.files}, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def is_stale(self, manifest_content: bytes) -> bool:
+        """
+        Returns if the manifest changed since the lock was created
+
+        :param manifest_content:        raw contents of the current manifest.json
+        :return:                        Boolean
+        """
+        return self.digest(manifest_content) != self.manifest_digest
+
+    def get_mods(self) -> list[Mod]:
+        """
+        Returns the locked files as Mod objects (Makes no web requests)
+
+        :return:                        list of downloader.mod_repository.Mod
+        """
+        return [
+            Mod(file.get("projectID"), file.get("fileID"), file={
+                "id": file.get("fileID"),
+                "fileName": file.get("name"),
+                "downloadUrl": file.get("url"),
+                "fileLength": file.get("size"),
+                "hashes": [{"value": file.get("sha1"), "algo": 1}] if file.get("sha1") else [],
+                "packageFingerprint": file.get("fingerprint")
+            })
+            for file in self.files
+        ]
@@ -29,10 +29,20 @@ class ManifestObject:
 
 
 class ModManifest(json.JSONDecoder):
-    def __init__(self, manifest_file: str):
+    def __init__(self, manifest_file: str = None, content: str or bytes = None):
+        """
+        Parsed manifest.json of a mod-pack
+
+        :param manifest_file:           path of the manifest.json
+        :param content:                 contents of the manifest.json (used instead of manifest_file)
+        """
         super().__init__(object_hook=None, object_pairs_hook=None)
-        with open(manifest_file, "r") as f:
-            self.data = self.decode(f.read())
+        if content is None:
+            with open(manifest_file, "r") as f:
+                content = f.read()
+        if type(content) == bytes:
+            content = content.decode("utf-8-sig")
+        self.data = self.decode(content)
 
     def get(self, key: str = None):
         if key is not None:
@@ -0,0 +1,257 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+import configuration
+from downloader.metrics import current_metrics
+
+
+FILE_FIELDS = ("id", "fileName", "downloadUrl", "fileLength", "hashes", "packageFingerprint", "displayName", "fileDate")
+
+# statements refreshing the access time (used for LRU eviction) of the rows of every table
+ACCESS_UPDATES = {
+    "files": "UPDATE files SET accessed = ? WHERE project_id = ? AND file_id = ?",
+    "responses": "UPDATE responses SET accessed = ? WHERE key = ?",
+    "slugs": "UPDATE slugs SET accessed = ? WHERE slug = ?"
+}
+
+
+class MetadataCache:
+    access_flush_interval = 1000
+    evict_interval = 1000
+
+    def __init__(self, path: str = None, max_entries: int = None, ttl: float = None):
+        """
+        Persistent SQLite cache for CurseForge metadata\n
+        File records are immutable and cached by (projectID, fileID) until evicted, so are the project ids of slugs,
+        project-level responses (which may change) expire after `ttl` seconds.
+        Reads never write to disk, access times are written in batches of `access_flush_interval` and tables
+        are trimmed every `evict_interval` inserts (so they may exceed max_entries by that much in between).
+
+        :param path:                    location of the cache database (defaults to configuration.cache_path)
+        :param max_entries:             max number of rows per table, least recently used rows are evicted first
+        :param ttl:                     seconds project-level responses stay valid (0 disables caching them)
+        """
+        self.path = path or configuration.cache_path
+        self.max_entries = max_entries or configuration.cache_max_entries
+        self.ttl = configuration.cache_ttl if ttl is None else ttl
+        self.hits = 0
+        self.misses = 0
+        self.__accessed = {table: {} for table in ACCESS_UPDATES}
+        self.__inserts = {table: 0 for table in ACCESS_UPDATES}
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(self.path, check_same_thread=False)
+        self.__db.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                project_id INTEGER, file_id INTEGER, data TEXT, accessed REAL,
+                PRIMARY KEY (project_id, file_id)
+            );
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY, data TEXT, fetched REAL, accessed REAL
+            );
+            CREATE TABLE IF NOT EXISTS slugs (
+                slug TEXT PRIMARY KEY, project_id INTEGER, accessed REAL
+            );
+            CREATE INDEX IF NOT EXISTS files_accessed ON files (accessed);
+            CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+            CREATE INDEX IF NOT EXISTS slugs_accessed ON slugs (accessed);
+        """)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        with self.__lock:
+            self.__flush_access()
+            self.__db.commit()
+            self.__db.close()
+
+    def __count(self, found: bool):
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.add_cache_lookup(found)
+
+    def __touch(self, table: str, *key):
+        self.__accessed[table][key] = time.time()
+        if sum(len(keys) for keys in self.__accessed.values()) >= self.access_flush_interval:
+            self.__flush_access()
+            self.__db.commit()
+
+    def __flush_access(self):
+        for table, keys in self.__accessed.items():
+            if keys:
+                self.__db.executemany(ACCESS_UPDATES[table], [(accessed, *key) for key, accessed in keys.items()])
+                self.__accessed[table] = {}
+
+    def __inserted(self, table: str, count: int):
+        self.__inserts[table] += count
+        if self.__inserts[table] >= self.evict_interval:
+            self.__inserts[table] = 0
+            self.__flush_access()
+            self.__evict(table)
+
+    def __evict(self, table: str):
+        count = self.__db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        if count > self.max_entries:
+            self.__db.execute(
+                f"DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} ORDER BY accessed LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def get_file(self, project_id: int, file_id: int) -> dict or None:
+        """
+        Returns the cached file record of a mod file
+
+        :param project_id:              CurseForge project id
+        :param file_id:                 CurseForge file id
+        :return:                        file json (dict) or None if not cached
+        """
+        with self.__lock:
+            row = self.__db.execute(
+                "SELECT data FROM files WHERE project_id = ? AND file_id = ?", (project_id, file_id)
+            ).fetchone()
+            self.__count(row is not None)
+            if row is None:
+                return
+            self.__touch("files", project_id, file_id)
+        return json.loads(row[0])
+
+    def put_files(self, project_id: int, files: list):
+        """
+        Stores file records of a project
+
+        :param project_id:              CurseForge project id
+        :param files:                   list of file json objects as returned by the api
+        :return:                        None
+        """
+        now = time.time()
+        rows = [
+            (project_id, file.get("id"), json.dumps({key: file.get(key) for key in FILE_FIELDS}), now)
+            for file in files
+        ]
+        with self.__lock:
+            self.__db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", rows)
+            self.__inserted("files", len(rows))
+            self.__db.commit()
+
+    def put_file(self, project_id: int, file: dict):
+        self.put_files(project_id, [file])
+
+    def get_response(self, key: str) -> dict or list or None:
+        """
+        Returns a cached project-level api response if it has not expired
+
+        :param key:                     api path of the response
+        :return:                        json object or None if not cached or expired
+        """
+        if not self.ttl:
+            return
+        with self.__lock:
+            row = self.__db.execute(
+                "SELECT data FROM responses WHERE key = ? AND fetched > ?", (key, time.time() - self.ttl)
+            ).fetchone()
+            self.__count(row is not None)
+            if row is None:
+                return
+            self.__touch("responses", key)
+        return json.loads(row[0])
+
+    def put_response(self, key: str, data: dict or list):
+        if not self.ttl:
+            return
+        now = time.time()
+        with self.__lock:
+            self.__db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, json.dumps(data), now, now))
+            self.__inserted("responses", 1)
+            self.__db.commit()
+
+    def get_project_id(self, slug: str) -> int or None:
+        """
+        Returns the cached project id of a project slug
+
+        :param slug:                    CurseForge project slug
+        :return:                        project id or None if not cached
+        """
+        with self.__lock:
+            row = self.__db.execute("SELECT project_id FROM slugs WHERE slug = ?", (slug,)).fetchone()
+            self.__count(row is not None)
+            if row is None:
+                return
+            self.__touch("slugs", slug)
+        return row[0]
+
+    def put_slugs(self, slugs: dict[str, int]):
+        now = time.time()
+        with self.__lock:
+            self.__db.executemany(
+                "INSERT OR REPLACE INTO slugs VALUES (?, ?, ?)", [(slug, project_id, now) for slug, project_id in slugs.items()]
+            )
+            self.__inserted("slugs", len(slugs))
+            self.__db.commit()
+
+
+class FileIndex:
+    def __init__(self):
+        """
+        In-memory index of fetched project file lists keyed by project id and file id
+        (Shared between all mods and packs of a process)
+        """
+        self.__projects = {}
+        self.__lock = threading.Lock()
+
+    def put_files(self, project_id: int, files: list):
+        index = {file.get("id"): {key: file.get(key) for key in FILE_FIELDS} for file in files}
+        with self.__lock:
+            self.__projects[project_id] = index
+
+    def has_project(self, project_id: int) -> bool:
+        return project_id in self.__projects
+
+    def get_file(self, project_id: int, file_id: int) -> dict or None:
+        return self.__projects.get(project_id, {}).get(file_id)
+
+
+class ProjectIndex:
+    def __init__(self, ttl: float = None):
+        """
+        In-memory index of project lookups, maps slugs to project ids and api paths to project-level responses
+        (Shared between all packs of a process, responses expire after `ttl` seconds like in the MetadataCache)
+
+        :param ttl:                     seconds project-level responses stay valid (defaults to configuration.cache_ttl)
+        """
+        self.ttl = configuration.cache_ttl if ttl is None else ttl
+        self.__slugs = {}
+        self.__responses = {}
+        self.__lock = threading.Lock()
+
+    def put_slugs(self, slugs: dict[str, int]):
+        with self.__lock:
+            self.__slugs.update(slugs)
+
+    def get_project_id(self, slug: str) -> int or None:
+        return self.__slugs.get(slug)
+
+    def put_response(self, key: str, data: dict or list):
+        with self.__lock:
+            self.__responses[key] = (data, time.monotonic())
+
+    def get_response(self, key: str) -> dict or list or None:
+        data, fetched = self.__responses.get(key, (None, 0))
+        if data is None or time.monotonic() - fetched > self.ttl:
+            return
+        return data
+
+
+file_index = FileIndex()
+project_index = ProjectIndex()
@@ -0,0 +1,187 @@
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "buckets": {str(bound): count for bound, count in zip(self.buckets, self.counts)}
+        }
+
+
+_current = contextvars.ContextVar("metrics", default=None)
+
+
+def current_metrics() -> "Metrics" or None:
+    """
+    Returns the Metrics collected by the run of the calling context (see collect), None outside of a run
+    """
+    return _current.get()
+
+
+@contextmanager
+def collect(metrics: "Metrics"):
+    """
+    Makes metrics the Metrics of the current context, the HTTP clients and the MetadataCache record into it\n
+    Asyncio tasks inherit it, functions run on other threads have to be wrapped with with_current.
+
+    :param metrics:                 downloader.metrics.Metrics of the run
+    """
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+def with_current(function: callable) -> callable:
+    """
+    Wraps a function so it records into the Metrics of the calling context on whichever thread it runs
+
+    :param function:                function to submit to a thread pool or to run as thread target
+    :return:                        wrapped function
+    """
+    metrics = _current.get()
+
+    def run(*args, **kwargs):
+        token = _current.set(metrics)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return run
+
+
+class Metrics:
+    def __init__(self):
+        """
+        Measurements of a single run (phase durations, request latencies, transferred bytes, retries and cache hits)\n
+        Filled by DownloadManager during download()/upgrade() and available as DownloadManager.metrics afterwards.
+        Requests, retries and cache lookups are recorded into the Metrics of the calling context (see collect),
+        so concurrent runs sharing a client or cache don't count each other's.
+        """
+        self.phases = {}
+        self.requests = {}
+        self.bytes_downloaded = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.__lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Measures the duration of the enclosed block as phase `name`
+
+        :param name:                    name of the phase
+        """
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            with self.__lock:
+                self.phases[name] = self.phases.get(name, 0) + time.monotonic() - start
+
+    def observe_request(self, kind: str, seconds: float):
+        with self.__lock:
+            self.requests.setdefault(kind, Histogram()).observe(seconds)
+
+    def add_bytes(self, count: int):
+        with self.__lock:
+            self.bytes_downloaded += count
+
+    def add_retry(self):
+        with self.__lock:
+            self.retries += 1
+
+    def add_cache_lookup(self, hit: bool):
+        with self.__lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+    def bytes_per_second(self) -> float:
+        seconds = self.phases.get("download") or self.phases.get("resolve_and_download") or 0
+        return self.bytes_downloaded / seconds if seconds else 0.0
+
+    def cache_hit_rate(self) -> float:
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else 0.0
+
+    def to_dict(self) -> dict:
+        with self.__lock:
+            return {
+                "phases": {name: round(seconds, 6) for name, seconds in self.phases.items()},
+                "requests": {kind: histogram.to_dict() for kind, histogram in self.requests.items()},
+                "bytes_downloaded": self.bytes_downloaded,
+                "bytes_per_second": round(self.bytes_per_second(), 2),
+                "retries": self.retries,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "cache_hit_rate": round(self.cache_hit_rate(), 4)
+            }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_prometheus(self, prefix: str = "modpack") -> str:
+        """
+        Returns the metrics in the Prometheus text exposition format
+
+        :param prefix:                  prefix of all metric names
+        :return:                        metrics text
+        """
+        data = self.to_dict()
+        lines = [
+            f"# HELP {prefix}_phase_seconds Duration of the install phases",
+            f"# TYPE {prefix}_phase_seconds gauge"
+        ]
+        lines += [f'{prefix}_phase_seconds{{phase="{name}"}} {seconds}' for name, seconds in data["phases"].items()]
+
+        lines += [
+            f"# HELP {prefix}_request_duration_seconds Latency of single HTTP requests",
+            f"# TYPE {prefix}_request_duration_seconds histogram"
+        ]
+        for kind, histogram in data["requests"].items():
+            lines += [
+                f'{prefix}_request_duration_seconds_bucket{{kind="{kind}",le="{bound}"}} {count}'
+                for bound, count in histogram["buckets"].items()
+            ]
+            lines += [
+                f'{prefix}_request_duration_seconds_bucket{{kind="{kind}",le="+Inf"}} {histogram["count"]}',
+                f'{prefix}_request_duration_seconds_sum{{kind="{kind}"}} {histogram["sum"]}',
+                f'{prefix}_request_duration_seconds_count{{kind="{kind}"}} {histogram["count"]}'
+            ]
+
+        for name, kind, value, text in (
+            ("downloaded_bytes_total", "counter", data["bytes_downloaded"], "Bytes of mod files downloaded"),
+            ("download_bytes_per_second", "gauge", data["bytes_per_second"], "Average download throughput"),
+            ("request_retries_total", "counter", data["retries"], "Retried HTTP requests"),
+            ("cache_hits_total", "counter", data["cache_hits"], "Metadata cache hits"),
+            ("cache_misses_total", "counter", data["cache_misses"], "Metadata cache misses"),
+            ("cache_hit_ratio", "gauge", data["cache_hit_rate"], "Share of metadata lookups answered by the cache")
+        ):
+            lines += [f"# HELP {prefix}_{name} {text}", f"# TYPE {prefix}_{name} {kind}", f"{prefix}_{name} {value}"]
+        return "\n".join(lines) + "\n"
@@ -1,35 +1,79 @@
-import requests
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 import configuration
+from downloader.metadata_cache import MetadataCache, FileIndex, file_index
+from downloader.http_client import HttpClient, default_client
+from downloader.metrics import with_current
 
 
 class Mod:
-    def __init__(self, mod_id: int, file_id: int):
-        self.__get_files(mod_id, file_id)
+    def __init__(self, mod_id: int, file_id: int, cache: MetadataCache = None, index: FileIndex = None, file: dict = None, client: HttpClient = None):
+        self.mod_id = mod_id
+        self.file_id = file_id
+        self.client = client or default_client()
+        self.cache = cache
+        self.index = index or file_index
+        if file is not None:
+            self.__set_file(file)
+        else:
+            self.__get_files(mod_id, file_id)
 
-    def __make_request(self, path: str, retry: bool = True):
-        resp = requests.get(f"{configuration.c_forge_api}/addon/{path}", headers=configuration.request_headers, timeout=60)
+    def __make_request(self, path: str, missing_ok: bool = False):
+        resp = self.client.get(self.client.api_url(f"addon/{path}"))
+        if resp.status_code == 404 and missing_ok:
+            return
         if resp.status_code != 200:
-            if retry:
-                return self.__make_request(path, retry=False)
-            raise ConnectionError(resp.status_code, resp.reason, "Failed after 1 retry")
+            raise ConnectionError(resp.status_code, resp.reason, f"Failed after {self.client.retry.max_retries} retries")
         return resp.json()
 
-    def __get_files(self, mod_id: int, file_id: int):
-        file1 = self.__make_request(str(mod_id))
-        if file1.get("id") == file_id:
-            self.__set_file(file1)
-            return
-        files2 = self.__make_request(f"{mod_id}/files")
-        for file in files2:
+    def __from_cache(self, mod_id: int, file_id: int) -> dict or None:
+        if self.cache is not None:
+            return self.cache.get_file(mod_id, file_id)
+
+    def __from_index(self, mod_id: int, file_id: int) -> dict or None:
+        return self.index.get_file(mod_id, file_id)
+
+    def __from_file_endpoint(self, mod_id: int, file_id: int) -> dict or None:
+        return self.__make_request(f"{mod_id}/file/{file_id}", missing_ok=True)
+
+    def __from_project(self, mod_id: int, file_id: int) -> dict or None:
+        project = self.__make_request(str(mod_id))
+        if project.get("id") == file_id:
+            return project
+        for file in project.get("latestFiles") or []:
             if file.get("id") == file_id:
+                return file
+
+    def __from_file_list(self, mod_id: int, file_id: int) -> dict or None:
+        if self.index.has_project(mod_id):
+            return
+        files = self.__make_request(f"{mod_id}/files")
+        self.index.put_files(mod_id, files)
+        if self.cache is not None:
+            self.cache.put_files(mod_id, files)
+        return self.index.get_file(mod_id, file_id)
+
+    def __get_files(self, mod_id: int, file_id: int):
+        lookups = [
+            self.__from_cache, self.__from_index, self.__from_file_endpoint,
+            self.__from_project, self.__from_file_list
+        ]
+        for i, lookup in enumerate(lookups):
+            file = lookup(mod_id, file_id)
+            if file is not None:
                 self.__set_file(file)
+                if self.cache is not None and i > 0:
+                    self.cache.put_file(mod_id, file)
                 return
+        raise ConnectionError(404, "Not Found", f"File '{file_id}' does not exist in project '{mod_id}'")
 
     def __set_file(self, file_json: dict):
         self.file = {
             "name": file_json.get("fileName"),
-            "url": file_json.get("downloadUrl")
+            "url": file_json.get("downloadUrl"),
+            "size": file_json.get("fileLength"),
+            "sha1": next((h.get("value") for h in file_json.get("hashes") or [] if h.get("algo") == 1), None),
+            "fingerprint": file_json.get("packageFingerprint")
         }
 
     def get(self):
@@ -37,27 +81,139 @@ class Mod:
 
 
 class ModRepository:
-    def __init__(self, files_from_manifest: list, progress: callable = None):
+    def __init__(
+        self,
+        files_from_manifest: list,
+        progress: callable = None,
+        workers: int = None,
+        on_resolved: callable = None,
+        cache: MetadataCache = None,
+        batch_size: int = None,
+        client: HttpClient = None
+    ):
+        """
+        Resolves all files of a manifest into Mod objects
+        (Makes many web requests, up to `workers` at a time)
+
+        :param files_from_manifest:     "files" list of the manifest.json
+        :param progress:                callback for resolution progress (called with done, total)
+        :param workers:                 max number of concurrent resolutions (defaults to configuration.resolve_workers)
+        :param on_resolved:             callback called from the resolving thread with every Mod as soon as it is resolved
+        :param cache:                   persistent metadata cache to read from and fill
+        :param batch_size:              number of files resolved per bulk request (defaults to configuration.resolve_batch_size, 0 disables bulk requests)
+        :param client:                  shared HTTP client (defaults to downloader.http_client.default_client())
+        """
         self.mod_list = list()
         self.errors = list()
         self.progress_callback = progress
+        self.resolved_callback = on_resolved
+        self.cache = cache
+        self.client = client or default_client()
+        self.workers = workers or configuration.resolve_workers
+        self.batch_size = configuration.resolve_batch_size if batch_size is None else batch_size
         self.__load_mods(files_from_manifest)
 
+    def __resolve(self, file: dict, file_json: dict = None) -> Mod:
+        mod = Mod(file.get("projectID"), file.get("fileID"), cache=self.cache, file=file_json, client=self.client)
+        if self.resolved_callback is not None:
+            self.resolved_callback(mod)
+        return mod
+
+    def __request_files(self, file_ids: list) -> dict:
+        try:
+            resp = self.client.post(self.client.api_url("addon/files"), json=file_ids)
+        except OSError:
+            return {}
+        if resp.status_code != 200:
+            return {}
+
+        try:
+            data = resp.json()
+        except ValueError:
+            return {}
+        if type(data) == dict:
+            data = [file for files in data.values() for file in (files if type(files) == list else [files])]
+        return {file.get("id"): file for file in data}
+
+    def __resolve_batch(self, chunk: list[tuple[int, dict]]) -> list[tuple[int, dict, Mod or None]]:
+        records = self.__request_files([file.get("fileID") for _, file in chunk])
+        if self.cache is not None:
+            projects = {}
+            for _, file in chunk:
+                if file.get("fileID") in records:
+                    projects.setdefault(file.get("projectID"), []).append(records[file.get("fileID")])
+            for project_id, files in projects.items():
+                self.cache.put_files(project_id, files)
+
+        resolved = []
+        for i, file in chunk:
+            record = records.get(file.get("fileID"))
+            resolved.append((i, file, None if record is None else self.__resolve(file, record)))
+        return resolved
+
+    def __is_known(self, file: dict) -> bool:
+        if file_index.get_file(file.get("projectID"), file.get("fileID")) is not None:
+            return True
+        return self.cache is not None and self.cache.get_file(file.get("projectID"), file.get("fileID")) is not None
+
     def __load_mods(self, file_list: list):
-        for i, file in enumerate(file_list):
-            if self.progress_callback is not None:
-                self.progress_callback(i, len(file_list))
-
-            if not file.get("required"):
-                continue
-            try:
-                self.mod_list.append(
-                    Mod(file.get("projectID"), file.get("fileID"))
-                )
-            except ConnectionError:
-                self.errors.append(
-                    (file.get("projectID"), file.get("fileID"))
-                )
+        file_list = list(file_list)
+        required = [file for file in file_list if file.get("required")]
+        results = [None] * len(required)
+        done = len(file_list) - len(required)
+
+        batched = []
+        if self.batch_size:
+            batched = [(i, file) for i, file in enumerate(required) if not self.__is_known(file)]
+        batched_ids = {i for i, _ in batched}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {
+                pool.submit(with_current(self.__resolve), file): i
+                for i, file in enumerate(required) if i not in batched_ids
+            }
+            chunks = {}
+            for start in range(0, len(batched), self.batch_size or 1):
+                chunk = batched[start:start + self.batch_size]
+                future = pool.submit(with_current(self.__resolve_batch), chunk)
+                futures[future] = None
+                chunks[future] = chunk
+
+            while futures:
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    i = futures.pop(future)
+                    if i is None:
+                        chunk = chunks.pop(future)
+                        try:
+                            resolved = future.result()
+                        except OSError:
+                            # the bulk request failed, every file of the chunk is looked up on its own
+                            resolved = [(j, file, None) for j, file in chunk]
+                        for j, file, mod in resolved:
+                            if mod is None:
+                                futures[pool.submit(with_current(self.__resolve), file)] = j
+                                continue
+                            results[j] = mod
+                            if self.progress_callback is not None:
+                                self.progress_callback(done, len(file_list))
+                            done += 1
+                        continue
+
+                    if self.progress_callback is not None:
+                        self.progress_callback(done, len(file_list))
+                    done += 1
+
+                    try:
+                        results[i] = future.result()
+                    except OSError:
+                        # ConnectionError raised by the lookups and the transport errors of requests
+                        # (requests.ConnectionError, requests.Timeout) which are OSError subclasses
+                        self.errors.append(
+                            (required[i].get("projectID"), required[i].get("fileID"))
+                        )
+
+        self.mod_list = [mod for mod in results if mod is not None]
 
     def get(self):
         return self.mod_list, self.errors
@@ -1,20 +1,26 @@
 import os.path
 
-import requests
 import tempfile
 
 import configuration
+from downloader.metadata_cache import MetadataCache, file_index, project_index
+from downloader.http_client import HttpClient, default_client
+from downloader.segmented import segmented_download
 
 
 class ModPack:
-    def __init__(self, mod_pack: str):
+    def __init__(self, mod_pack: str, cache: MetadataCache = None, client: HttpClient = None):
         """
         Represents the provided mod-pack as an object
         (Will make web requests)
 
         :param mod_pack:                Mod Pack location (can be: url, .zip file, folder with manifest.json)
+        :param cache:                   persistent metadata cache to read from and fill
+        :param client:                  shared HTTP client (defaults to downloader.http_client.default_client())
         """
         self.mod_pack_loc = mod_pack
+        self.cache = cache
+        self.client = client or default_client()
         self.mod_pack = self._get_mod_pack_from_url()
 
     @staticmethod
@@ -24,24 +30,93 @@ class ModPack:
                 return True
         return False
 
-    def _get_mod_pack_from_url(self, retry: bool = True) -> dict or None:
-        if not self.is_url():
-            return
+    def _parse_location(self) -> tuple[str or None, int or None]:
+        # (slug, project id) of a ".../modpacks/<slug>" or ".../projects/<id or slug>" url
+        for marker in ("modpacks/", "projects/"):
+            if marker in self.mod_pack_loc:
+                name = self.mod_pack_loc.split(marker)[1].split("/")[0].split("?")[0]
+                return (None, int(name)) if name.isdigit() else (name, None)
+        return None, None
+
+    def _known_project_id(self, slug: str) -> int or None:
+        project_id = project_index.get_project_id(slug)
+        if project_id is None and self.cache is not None:
+            project_id = self.cache.get_project_id(slug)
+            if project_id is not None:
+                project_index.put_slugs({slug: project_id})
+        return project_id
+
+    def _cached(self, path: str) -> dict or list or None:
+        data = project_index.get_response(path)
+        if data is None and self.cache is not None:
+            data = self.cache.get_response(path)
+            if data is not None:
+                project_index.put_response(path, data)
+        return data
+
+    def _store(self, path: str, data: dict or list):
+        project_index.put_response(path, data)
+        if self.cache is not None:
+            self.cache.put_response(path, data)
 
-        slug = self.mod_pack_loc.split("modpacks/")[1].split("/")[0]
-        resp = requests.get(
-            f"{configuration.c_forge_api}/addon/search?gameId=432&categoryId=0&searchFilter={slug}&pageSize=20&sort=1&sortDescending=true&sectionId=4471",
-            headers=configuration.request_headers
+    @staticmethod
+    def _search_path(slug: str, index: int) -> str:
+        return (
+            f"addon/search?gameId=432&categoryId=0&searchFilter={slug}&pageSize={configuration.search_page_size}"
+            f"&index={index}&sort=1&sortDescending=true&sectionId=4471"
         )
-        if not resp.status_code == 200:
-            if retry:
-                return self._get_mod_pack_from_url(retry=False)
-            raise ConnectionError(resp.status_code, resp.reason, "Failed after 1 retry")
-        resp = resp.json()
-        for obj in resp:
+
+    def _match_search(self, slug: str, results: list) -> dict or None:
+        # remembers the slugs of all results and returns the project with the wanted slug
+        slugs = {obj.get("slug"): obj.get("id") for obj in results if obj.get("slug")}
+        project_index.put_slugs(slugs)
+        if self.cache is not None and slugs:
+            self.cache.put_slugs(slugs)
+        for obj in results:
             if obj.get("slug") == slug:
+                self._store(f"addon/{obj.get('id')}", obj)
                 return obj
-        return
+
+    def __get(self, path: str, missing_ok: bool = False, cached: bool = True) -> dict or list or None:
+        data = self._cached(path) if cached else None
+        if data is not None:
+            return data
+        resp = self.client.get(self.client.api_url(path))
+        if resp.status_code == 404 and missing_ok:
+            return
+        if not resp.status_code == 200:
+            raise ConnectionError(resp.status_code, resp.reason, f"Failed after {self.client.retry.max_retries} retries")
+        data = resp.json()
+        if cached:
+            self._store(path, data)
+        return data
+
+    def _get_mod_pack_from_url(self) -> dict or None:
+        """
+        Looks the mod-pack up by its project id if it is known (from the url, the slug index or the cache),
+        otherwise pages through the search results until the slug matches
+
+        :return:                    project json (dict) or None if the location is no url
+        """
+        if not self.is_url():
+            return
+
+        slug, project_id = self._parse_location()
+        project_id = project_id or self._known_project_id(slug)
+        if project_id is not None:
+            project = self.__get(f"addon/{project_id}", missing_ok=True)
+            if project is not None and slug in (None, project.get("slug")):
+                return project
+
+        if slug is not None:
+            for index in range(0, configuration.search_max_results, configuration.search_page_size):
+                results = self.__get(self._search_path(slug, index), cached=False)
+                project = self._match_search(slug, results)
+                if project is not None:
+                    return project
+                if len(results) < configuration.search_page_size:
+                    break
+        raise ConnectionError(404, "Not Found", f"Mod-pack '{self.mod_pack_loc}' not found")
 
     def is_url(self) -> bool:
         """
@@ -64,35 +139,51 @@ class ModPack:
     def get_available_files(self) -> list:
         """
         Returns all available files for the specified mod pack
+        (Answered from the project index or the cache until configuration.cache_ttl has passed)
 
         :return:                    json object (dict)
         """
-        resp = requests.get(
-            f"{configuration.c_forge_api}/addon/{self.mod_pack.get('id')}/files",
-            headers=configuration.request_headers
-        )
-        if not resp.status_code == 200:
-            raise ConnectionError(resp.status_code, resp.reason)
-        return resp.json()
-
-    def download_file(self, file: dict, progress: callable = None) -> str:
+        path = f"addon/{self.mod_pack.get('id')}/files"
+        files = self._cached(path)
+        if files is not None:
+            return files
+
+        files = self.__get(path, cached=False)
+        self._store(path, files)
+        file_index.put_files(self.mod_pack.get("id"), files)
+        if self.cache is not None:
+            self.cache.put_files(self.mod_pack.get("id"), files)
+        return files
+
+    def download_file(self, file: dict, progress: callable = None, chunk_size: int = None, segments: int = None) -> str:
         """
         Downloads the specified file of the mod pack to a temporary location and returns its path
+        (Streams the file to disk, memory use only depends on chunk_size)
 
         :param file:                file dict for file under mod pack
-        :param progress:            callback for file download progress
+        :param progress:            callback for file download progress (called once per chunk)
+        :param chunk_size:          bytes read and written at once (defaults to configuration.download_chunk_size)
+        :param segments:            number of parallel range requests for files above configuration.segmented_threshold
+                                    (defaults to configuration.download_segments, 1 always uses a single stream)
         :return:                    downloaded file location
         """
         destination = os.path.join(tempfile.mkdtemp(), file.get("fileName"))
-        resp = requests.get(file.get("downloadUrl"))
-        if not resp.status_code == 200:
-            raise ConnectionError(resp.status_code, resp.reason)
-        total = int(resp.headers.get('content-length', 0))
-        size = 0
         is_url = self.is_url()
-        with open(destination, "wb") as f:
-            for data in resp.iter_content(chunk_size=1024):
-                size += f.write(data)
-                if progress is not None:
-                    progress(size, total, is_url)
+        if (file.get("fileLength") or 0) >= configuration.segmented_threshold and segments != 1:
+            if segmented_download(
+                self.client, file.get("downloadUrl"), destination, segments,
+                None if progress is None else lambda size, total: progress(size, total, is_url)
+            ):
+                return destination
+
+        with self.client.get(file.get("downloadUrl"), stream=True) as resp:
+            if not resp.status_code == 200:
+                raise ConnectionError(resp.status_code, resp.reason)
+            total = int(resp.headers.get('content-length', 0))
+            size = 0
+            with open(destination, "wb") as f:
+                for data in resp.iter_content(chunk_size=chunk_size or configuration.download_chunk_size):
+                    size += f.write(data)
+                    if progress is not None:
+                        progress(size, total, is_url)
         return destination
@@ -0,0 +1,151 @@
+import os
+import zlib
+import shutil
+import zipfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import configuration
+
+
+def _safe_join(root: str, relative: str) -> str or None:
+    path = os.path.normpath(os.path.join(root, relative))
+    if os.path.isabs(relative) or os.path.commonpath([os.path.abspath(root), os.path.abspath(path)]) != os.path.abspath(root):
+        return
+    return path
+
+
+class PackSource:
+    def __init__(self, location: str):
+        """
+        Read access to the contents of a mod-pack without extracting it
+
+        :param location:                path of the mod-pack (.zip file or folder with manifest.json)
+        """
+        self.location = location
+
+    @staticmethod
+    def from_location(location: str) -> "PackSource":
+        """
+        Returns the matching PackSource for a mod-pack location
+
+        :param location:                path of the mod-pack (.zip file or folder with manifest.json)
+        :return:                        downloader.pack_source.PackSource
+        """
+        if os.path.isdir(location):
+            return FolderPackSource(location)
+        return ZipPackSource(location)
+
+    def close(self):
+        pass
+
+    def read(self, name: str) -> bytes:
+        raise NotImplementedError
+
+    def list_files(self, folder: str) -> list[str]:
+        """
+        Lists all files below a folder of the mod-pack
+
+        :param folder:                  folder inside the mod-pack (e.g. "overrides")
+        :return:                        paths of the files relative to the folder
+        """
+        raise NotImplementedError
+
+    def checksums(self, folder: str) -> dict[str, int]:
+        """
+        Returns the CRC-32 of all files below a folder of the mod-pack
+
+        :param folder:                  folder inside the mod-pack (e.g. "overrides")
+        :return:                        paths of the files relative to the folder mapped to their CRC-32
+        """
+        raise NotImplementedError
+
+    def _copy(self, folder: str, names: list[str], destination: str):
+        raise NotImplementedError
+
+    def copy_folder(self, folder: str, destination: str, names: list[str] = None, workers: int = None) -> list[str]:
+        """
+        Streams the files below a folder of the mod-pack into destination
+
+        :param folder:                  folder inside the mod-pack (e.g. "overrides")
+        :param destination:             target folder
+        :param names:                   only copy these files (relative to folder, defaults to all files)
+        :param workers:                 number of files copied in parallel (defaults to configuration.override_workers)
+        :return:                        paths of the copied files relative to destination
+        """
+        names = [name for name in (self.list_files(folder) if names is None else names) if _safe_join(destination, name)]
+        workers = min(workers or configuration.override_workers, len(names)) or 1
+        if workers == 1:
+            self._copy(folder, names, destination)
+            return names
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(self._copy, folder, names[i::workers], destination) for i in range(workers)]:
+                future.result()
+        return names
+
+
+class FolderPackSource(PackSource):
+    def read(self, name: str) -> bytes:
+        with open(os.path.join(self.location, name), "rb") as f:
+            return f.read()
+
+    def list_files(self, folder: str) -> list[str]:
+        root = os.path.join(self.location, folder)
+        return [
+            os.path.relpath(os.path.join(path, file), root).replace(os.sep, "/")
+            for path, _, files in os.walk(root) for file in files
+        ]
+
+    def checksums(self, folder: str) -> dict[str, int]:
+        checksums = {}
+        for name in self.list_files(folder):
+            crc = 0
+            with open(os.path.join(self.location, folder, name), "rb") as f:
+                for block in iter(lambda: f.read(configuration.download_chunk_size), b""):
+                    crc = zlib.crc32(block, crc)
+            checksums[name] = crc
+        return checksums
+
+    def _copy(self, folder: str, names: list[str], destination: str):
+        for name in names:
+            target = _safe_join(destination, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(os.path.join(self.location, folder, name), target)
+
+
+class ZipPackSource(PackSource):
+    def __init__(self, location: str):
+        super().__init__(location)
+        self.__zip = zipfile.ZipFile(location, "r")
+        self.__lock = threading.Lock()
+
+    def close(self):
+        self.__zip.close()
+
+    def read(self, name: str) -> bytes:
+        with self.__lock:
+            return self.__zip.read(name)
+
+    def list_files(self, folder: str) -> list[str]:
+        prefix = folder.rstrip("/") + "/"
+        return [
+            info.filename[len(prefix):] for info in self.__zip.infolist()
+            if info.filename.startswith(prefix) and not info.is_dir()
+        ]
+
+    def checksums(self, folder: str) -> dict[str, int]:
+        prefix = folder.rstrip("/") + "/"
+        return {
+            info.filename[len(prefix):]: info.CRC for info in self.__zip.infolist()
+            if info.filename.startswith(prefix) and not info.is_dir()
+        }
+
+    def _copy(self, folder: str, names: list[str], destination: str):
+        prefix = folder.rstrip("/") + "/"
+        with zipfile.ZipFile(self.location, "r") as zf:
+            for name in names:
+                target = _safe_join(destination, name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with zf.open(prefix + name) as src, open(target, "wb") as dst:
+                    shutil.copyfileobj(src, dst, configuration.download_chunk_size)
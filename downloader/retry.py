@@ -0,0 +1,245 @@
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+
+import configuration
+
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(ConnectionError):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        """
+        Limits the rate of requests of all threads sharing the bucket
+
+        :param rate:                    tokens added per second (0 disables the limit)
+        :param burst:                   max number of tokens which can be saved up
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.__tokens = float(self.burst)
+        self.__updated = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Takes a token without blocking
+
+        :return:                        0 if a token was taken, otherwise the seconds to wait before trying again
+        """
+        if not self.rate:
+            return 0
+        with self.__lock:
+            now = time.monotonic()
+            self.__tokens = min(self.burst, self.__tokens + (now - self.__updated) * self.rate)
+            self.__updated = now
+            if self.__tokens >= 1:
+                self.__tokens -= 1
+                return 0
+            return (1 - self.__tokens) / self.rate
+
+    def acquire(self):
+        while (wait := self.reserve()) > 0:
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int, reset_timeout: float):
+        """
+        Stops sending requests to a host after `threshold` consecutive failures,
+        a single trial request is let through after `reset_timeout` seconds
+
+        :param threshold:               consecutive failures which open the circuit (0 disables the breaker)
+        :param reset_timeout:           seconds the circuit stays open
+        """
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.__failures = 0
+        self.__opened = None
+        self.__lock = threading.Lock()
+
+    def check(self, host: str):
+        with self.__lock:
+            if self.__opened is None:
+                return
+            if time.monotonic() - self.__opened < self.reset_timeout:
+                raise CircuitOpenError(None, None, f"Circuit for '{host}' is open after {self.__failures} failures")
+            self.__opened = time.monotonic()
+
+    def record(self, success: bool):
+        with self.__lock:
+            if success:
+                self.__failures = 0
+                self.__opened = None
+                return
+            self.__failures += 1
+            if self.threshold and self.__failures >= self.threshold:
+                self.__opened = time.monotonic()
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_retries: int = None,
+        backoff: float = None,
+        max_backoff: float = None,
+        rate: float = None,
+        burst: int = None,
+        breaker_threshold: int = None,
+        breaker_timeout: float = None
+    ):
+        """
+        Retry, backoff and rate limiting shared by all requests of an HttpClient (or AsyncHttpClient)\n
+        Failed requests are retried with exponential backoff and jitter, Retry-After headers pause all
+        requests to the host, a token bucket caps the overall rate of api requests and a circuit breaker per host
+        stops requests to hosts which keep failing.
+
+        :param max_retries:             retries per request (defaults to configuration.max_retries)
+        :param backoff:                 base delay in seconds which doubles with every retry (defaults to configuration.retry_backoff)
+        :param max_backoff:             max delay between two attempts (defaults to configuration.retry_max_backoff)
+        :param rate:                    max api requests per second of all threads (defaults to configuration.request_rate, 0 disables)
+        :param burst:                   number of requests which may exceed the rate at once (defaults to configuration.request_burst)
+        :param breaker_threshold:       consecutive failures which open a host's circuit (defaults to configuration.breaker_threshold)
+        :param breaker_timeout:         seconds an open circuit rejects requests (defaults to configuration.breaker_timeout)
+        """
+        self.max_retries = configuration.max_retries if max_retries is None else max_retries
+        self.backoff = configuration.retry_backoff if backoff is None else backoff
+        self.max_backoff = configuration.retry_max_backoff if max_backoff is None else max_backoff
+        self.breaker_threshold = configuration.breaker_threshold if breaker_threshold is None else breaker_threshold
+        self.breaker_timeout = configuration.breaker_timeout if breaker_timeout is None else breaker_timeout
+        self.bucket = TokenBucket(
+            configuration.request_rate if rate is None else rate,
+            configuration.request_burst if burst is None else burst
+        )
+        self.retries = 0
+
+        self.__breakers = {}
+        self.__paused_until = {}
+        self.__lock = threading.Lock()
+
+    def __breaker(self, host: str) -> CircuitBreaker:
+        with self.__lock:
+            if host not in self.__breakers:
+                self.__breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_timeout)
+            return self.__breakers[host]
+
+    @staticmethod
+    def retry_after(resp: requests.Response) -> float or None:
+        """
+        Returns the delay requested by the Retry-After header of a response (seconds or http-date)
+
+        :param resp:                    response (anything with a headers mapping)
+        :return:                        seconds or None if the header is missing or invalid
+        """
+        value = resp.headers.get("Retry-After")
+        if value is None:
+            return
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return
+
+    def delay(self, attempt: int) -> float:
+        """
+        Returns the backoff delay before the given retry (exponential with full jitter)
+
+        :param attempt:                 number of the retry (starting at 0)
+        :return:                        delay in seconds
+        """
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def __pause(self, host: str, seconds: float):
+        with self.__lock:
+            self.__paused_until[host] = max(self.__paused_until.get(host, 0), time.monotonic() + seconds)
+
+    def before_attempt(self, host: str) -> float:
+        """
+        Checks the circuit of a host before an attempt (raises CircuitOpenError if it is open)\n
+        The caller has to wait the returned seconds before sending, so sync and async clients share the pauses.
+
+        :param host:                    host of the request
+        :return:                        seconds the host is still paused by a Retry-After (0 if not paused)
+        """
+        self.__breaker(host).check(host)
+        with self.__lock:
+            return max(0.0, self.__paused_until.get(host, 0) - time.monotonic())
+
+    def record(self, host: str, success: bool):
+        self.__breaker(host).record(success)
+
+    def retry_delay(self, host: str, attempt: int, status: int, retry_after: float = None) -> float:
+        """
+        Returns the delay before retrying a response with one of the RETRY_STATUSES\n
+        429 and 503 pause all requests to the host instead (see self.before_attempt) and return 0.
+
+        :param host:                    host of the request
+        :param attempt:                 number of the retry (starting at 0)
+        :param status:                  status code of the response
+        :param retry_after:             seconds requested by the Retry-After header of the response
+        :return:                        delay in seconds
+        """
+        delay = self.delay(attempt) if retry_after is None else retry_after
+        if status in (429, 503):
+            self.__pause(host, delay)
+            return 0
+        return delay
+
+    def count_retry(self, on_retry: callable = None):
+        with self.__lock:
+            self.retries += 1
+        if on_retry is not None:
+            on_retry()
+
+    def call(self, url: str, send: callable, rate_limited: bool = True, on_retry: callable = None) -> requests.Response:
+        """
+        Sends a request according to the policy
+
+        :param url:                     url of the request (used to identify the host)
+        :param send:                    function sending the request and returning the response
+        :param rate_limited:            if the request counts against the request rate
+        :param on_retry:                called (without arguments) before every retry
+        :return:                        the last response (may have a failed status if all retries were used)
+        """
+        host = urlparse(url).netloc
+        for attempt in range(self.max_retries + 1):
+            wait = self.before_attempt(host)
+            if wait > 0:
+                time.sleep(wait)
+            if rate_limited:
+                self.bucket.acquire()
+
+            last = attempt == self.max_retries
+            try:
+                resp = send()
+            except (requests.ConnectionError, requests.Timeout):
+                self.record(host, False)
+                if last:
+                    raise
+                self.count_retry(on_retry)
+                time.sleep(self.delay(attempt))
+                continue
+
+            if resp.status_code not in RETRY_STATUSES:
+                self.record(host, resp.status_code < 500)
+                return resp
+            self.record(host, False)
+            if last:
+                return resp
+
+            delay = self.retry_delay(host, attempt, resp.status_code, self.retry_after(resp))
+            resp.close()
+            self.count_retry(on_retry)
+            time.sleep(delay)
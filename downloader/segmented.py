@@ -0,0 +1,57 @@
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+
+import configuration
+from downloader.http_client import HttpClient
+from downloader.metrics import with_current
+
+
+def segmented_download(client: HttpClient, url: str, path: str, segments: int = None, progress: callable = None, slot: threading.Semaphore = None) -> bool:
+    """
+    Downloads a file over several parallel HTTP Range requests, each segment is written at its offset
+    into the preallocated file
+
+    :param client:                      HTTP client used for the requests
+    :param url:                         url of the file
+    :param path:                        location the file is written to
+    :param segments:                    number of parallel segments (defaults to configuration.download_segments)
+    :param progress:                    callback for the merged progress of all segments (called with done, total)
+    :param slot:                        semaphore every segment holds while it is transferred (e.g. a per-host connection limit)
+    :return:                            False if the server doesn't support range requests (nothing was written)
+    """
+    with client.head(url, allow_redirects=True) as head:
+        if head.status_code != 200 or head.headers.get("Accept-Ranges", "").lower() != "bytes":
+            return False
+        size = int(head.headers.get("Content-Length", 0))
+        url = head.url
+    if not size:
+        return False
+
+    segments = max(1, min(segments or configuration.download_segments, size // configuration.download_chunk_size or 1))
+    bounds = [(size * i // segments, size * (i + 1) // segments - 1) for i in range(segments)]
+    with open(path, "wb") as f:
+        f.truncate(size)
+
+    lock = threading.Lock()
+    done = [0]
+
+    def fetch(start: int, end: int):
+        with slot or nullcontext(), client.get(url, headers={"Range": f"bytes={start}-{end}"}, stream=True) as resp:
+            if resp.status_code != 206:
+                raise ConnectionError(resp.status_code, resp.reason, "Range request rejected")
+            with open(path, "r+b") as f:
+                f.seek(start)
+                for data in resp.iter_content(chunk_size=configuration.download_chunk_size):
+                    f.write(data)
+                    with lock:
+                        done[0] += len(data)
+                        if progress is not None:
+                            progress(done[0], size)
+                if f.tell() != end + 1:
+                    raise ConnectionError(None, None, f"Incomplete segment {start}-{end}")
+
+    with ThreadPoolExecutor(max_workers=segments) as pool:
+        for future in [pool.submit(with_current(fetch), start, end) for start, end in bounds]:
+            future.result()
+    return True
@@ -0,0 +1,67 @@
+import os
+import multiprocessing
+
+from downloader.hashing import file_sha1, file_fingerprint
+
+
+def check_file(path: str, size: int = None, sha1: str = None, fingerprint: int = None, mmap_threshold: int = None) -> bool:
+    """
+    Checks a file against its metadata (size first, then SHA-1 or the fingerprint if no SHA-1 is known)\n
+    Module level so it can run on a ProcessPoolExecutor.
+
+    :param path:                        path of the file
+    :param size:                        expected size in bytes
+    :param sha1:                        expected hex SHA-1 digest
+    :param fingerprint:                 expected CurseForge fingerprint
+    :param mmap_threshold:              files of at least this size are hashed from a memory map
+    :return:                            if the file matches
+    """
+    if size is not None and os.path.getsize(path) != size:
+        return False
+    if sha1 is not None:
+        return file_sha1(path, mmap_threshold=mmap_threshold) == sha1
+    if fingerprint is not None:
+        return file_fingerprint(path) == fingerprint
+    return True
+
+
+def pool_context() -> multiprocessing.context.BaseContext:
+    """
+    Returns the start method context of the hashing process pool\n
+    Forking would copy the locks held by the threads of the parent (event dispatcher, HTTP connection pools)
+    into the children, so new processes are started by a fork server (or spawned where there is none).
+
+    :return:                            multiprocessing context
+    """
+    return multiprocessing.get_context("forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+
+
+class VerifyReport:
+    def __init__(self, valid: list[str], missing: list[str], corrupt: list[str], extra: list[str], unresolved: list[tuple[int, int]] = None):
+        """
+        Result of checking the mods folder of an install against the resolved mod list
+
+        :param valid:                   mods which are present and match their metadata
+        :param missing:                 mods which are not present
+        :param corrupt:                 mods whose size or hash doesn't match
+        :param extra:                   files in the mods folder which are not part of the mod-pack
+        :param unresolved:              (projectID, fileID) of manifest files which could not be resolved (so not be checked)
+        """
+        self.valid = valid
+        self.missing = missing
+        self.corrupt = corrupt
+        self.extra = extra
+        self.unresolved = unresolved or []
+        self.repaired = []
+        self.removed = []
+
+    def is_healthy(self) -> bool:
+        return not (self.missing or self.corrupt or self.extra or self.unresolved)
+
+    def __str__(self):
+        text = f"{len(self.valid)} mods valid, {len(self.missing)} missing, {len(self.corrupt)} corrupt, {len(self.extra)} extra files"
+        if self.unresolved:
+            text += f", {len(self.unresolved)} unresolved"
+        if self.repaired or self.removed:
+            text += f"; {len(self.repaired)} mods repaired, {len(self.removed)} files removed"
+        return text
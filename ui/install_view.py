@@ -0,0 +1,184 @@
+import queue
+import threading
+import tkinter as tk
+import tkinter.ttk as ttk
+
+from ui.styles import Colors
+from ui.widgets import LabelFrame
+
+
+# DownloadManager channels shown by the InstallView
+CHANNELS = (
+    "process_start", "process_end", "manifest_load_start", "mod_load_start", "mod_load_progress",
+    "mod_load_end", "download_start", "download_progress", "download_file_progress", "download_file_skipped",
+    "download_file_linked", "download_verify_error", "download_interrupted", "overrides_start", "overrides_end"
+)
+
+
+class InstallView(LabelFrame):
+    fps = 20
+    max_events_per_frame = 2000
+
+    def __init__(self, master, style_type, text: str, dimensions: tuple[int, int], fps: int = None, on_finish: callable = None):
+        """
+        Shows a running install without blocking the Tk mainloop\n
+        The DownloadManager runs on its own thread, its listeners only put events into a queue which is drained
+        from the mainloop via after() at `fps` frames per second. Every mod is a row of one Listbox
+        which is updated in place, so large packs don't create a widget per mod.
+
+        :param master:                  parent widget
+        :param style_type:              background color of the status labels
+        :param text:                    label of the frame
+        :param dimensions:              width and height in pixels
+        :param fps:                     max updates of the view per second (defaults to InstallView.fps)
+        :param on_finish:               callback called from the mainloop with the DownloadManager once the install has ended
+        """
+        super().__init__(master, text=text)
+        self.__width, self.__height = dimensions
+        self.__interval = round(1000 / (fps or self.fps))
+        self.__on_finish = on_finish
+        self.__events = queue.Queue()
+        self.__manager = None
+        self.__thread = None
+
+        self.__rows = {}
+        self.__states = {}
+        self.__changed = set()
+        self.__failure = None
+
+        self.__status = tk.Label(self, bg=style_type, fg=Colors.body_color, anchor=tk.W, text="Waiting")
+        self.__progress = ttk.Progressbar(self, orient=tk.HORIZONTAL, mode="determinate", length=self.__width - 20)
+        self.__mod_list = tk.Listbox(
+            self, bg=Colors.gray_800, fg=Colors.body_color, highlightthickness=0, activestyle="none",
+            width=round(self.__width / 8), height=max(1, round((self.__height - 80) / 18))
+        )
+        self.__scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.__mod_list.yview)
+        self.__mod_list.configure(yscrollcommand=self.__scrollbar.set)
+
+        self.__status.grid(row=0, column=0, columnspan=2, sticky=tk.EW)
+        self.__progress.grid(row=1, column=0, columnspan=2, sticky=tk.EW, pady=5)
+        self.__mod_list.grid(row=2, column=0, sticky=tk.NSEW)
+        self.__scrollbar.grid(row=2, column=1, sticky=tk.NS)
+
+    def place(self, row, column, *args, **kwargs):
+        self.grid(row=row, column=column, *args, **kwargs)
+
+    def is_running(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def start(self, d_mgr, destination: str):
+        """
+        Installs the mod-pack of a DownloadManager to destination on a background thread
+
+        Exceptions raised by the install are shown as failure in the status.
+
+        :param d_mgr:                   downloader.curseforge_downloader.DownloadManager (closed once the install has ended)
+        :param destination:             path where the ModPack should be downloaded to
+        :return:                        None
+        """
+        if self.is_running():
+            raise Exception("InstallRunningException", "an install is already running in this view")
+
+        self.__mod_list.delete(0, tk.END)
+        self.__rows, self.__states, self.__changed = {}, {}, set()
+        self.__failure = None
+        self.__progress.configure(value=0, maximum=1)
+
+        self.__manager = d_mgr
+        for channel in CHANNELS:
+            d_mgr.register_listener(channel, lambda *args, channel=channel, **kwargs: self.__events.put((channel, args)))
+        self.__thread = threading.Thread(target=self.__run, args=(d_mgr.initialize(destination),), daemon=True)
+        self.__thread.start()
+        self.after(self.__interval, self.__poll)
+
+    def __run(self, install: threading.Thread):
+        # runs the target of the manager's thread here so its exceptions reach the mainloop
+        try:
+            install.run()
+        except Exception as e:
+            self.__events.put(("process_failed", (e,)))
+
+    def __row(self, name: str, state: str):
+        if name not in self.__rows:
+            self.__rows[name] = len(self.__rows)
+            self.__mod_list.insert(tk.END, "")
+        self.__states[name] = state
+        self.__changed.add(name)
+
+    def __handle(self, channel: str, args: tuple):
+        if channel == "manifest_load_start":
+            self.__status.configure(text="Reading manifest")
+        elif channel in ("mod_load_start", "mod_load_progress"):
+            if args:
+                self.__progress.configure(value=args[0], maximum=max(1, args[1]))
+            self.__status.configure(text=f"Resolving mods {args[0]}/{args[1]}" if args else "Resolving mods")
+        elif channel == "download_start":
+            self.__progress.configure(value=0)
+            self.__status.configure(text="Downloading mods")
+        elif channel == "download_progress":
+            done, total, name = args
+            self.__progress.configure(value=done, maximum=max(1, total))
+            self.__status.configure(text=f"Downloading mods {done}/{total}")
+            if self.__states.get(name) not in ("Skipped", "Linked"):
+                self.__row(name, "Done")
+        elif channel == "download_file_progress":
+            written, total, name = args
+            self.__row(name, f"{written * 100 // total if total else 0}%")
+        elif channel == "download_file_skipped":
+            self.__row(args[0], "Skipped")
+        elif channel == "download_file_linked":
+            self.__row(args[0], "Linked")
+        elif channel in ("download_verify_error", "download_interrupted"):
+            self.__row(args[0], f"Retry {args[1]}")
+        elif channel == "overrides_start":
+            self.__status.configure(text="Copying overrides")
+        elif channel == "process_failed":
+            self.__failure = args[0]
+
+    def __render(self):
+        for name in self.__changed:
+            index = self.__rows[name]
+            self.__mod_list.delete(index)
+            self.__mod_list.insert(index, f"{self.__states[name]:<12}{name}")
+            if self.__states[name] == "Failed":
+                self.__mod_list.itemconfigure(index, foreground=Colors.danger)
+        self.__changed = set()
+
+    def __poll(self):
+        finished = False
+        for _ in range(self.max_events_per_frame):
+            try:
+                channel, args = self.__events.get_nowait()
+            except queue.Empty:
+                break
+            if channel == "process_end":
+                finished = True
+                continue
+            self.__handle(channel, args)
+
+        if not finished and not self.is_running() and self.__events.empty():
+            finished = True
+
+        if finished:
+            self.__finish()
+        self.__render()
+        if not finished:
+            self.after(self.__interval, self.__poll)
+
+    def __finish(self):
+        self.__thread.join()
+        self.__manager.finish()
+        while not self.__events.empty():
+            self.__handle(*self.__events.get_nowait())
+
+        for error in self.__manager.errors:
+            self.__row(error[0], "Failed")
+        failed = len(self.__manager.errors)
+        if self.__failure is not None:
+            self.__status.configure(text=f"Failed: {self.__failure}")
+        else:
+            self.__status.configure(
+                text=f"Finished in {self.__manager.metrics.phases.get('total', 0):.1f}s" + (f", {failed} errors" if failed else "")
+            )
+        if self.__on_finish is not None:
+            self.__on_finish(self.__manager)
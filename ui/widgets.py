@@ -82,7 +82,7 @@ class FileInput(LabelFrame):
         self.__height = dimensions[1]
 
         super().__init__(master, text=text)
-        self.__path_label = tk.Label(self, bg=style_type, fg=Colors.body_color, font=("", 15), width=round(self.__width/15), height=16)
+        self.__path_label = tk.Label(self, bg=style_type, fg=Colors.body_color, font=("", 15), width=round(self.__width/15), height=1)
         self.__select_btn = Button(self, style_type, "Select", dimensions=(80, self.__height), command=self.select)
 
         self.__path_label.grid()